@@ -1,32 +1,129 @@
 #!/usr/bin/env python3
 
+from functools import lru_cache
+from typing import Union
 import se
 from lxml import etree, cssselect
 import regex
 
 
+# One parser shared by every tree we build. Entities are never resolved, so that parsing never reaches out to external DTDs,
+# and huge_tree lifts libxml2's limits on text node size and nesting depth, which very long single-file books can hit.
+_PARSER = etree.XMLParser(resolve_entities=False, huge_tree=True)
+
+@lru_cache(maxsize=1024)
+def _compile_xpath(selector: str, namespaces: tuple) -> etree.XPath:
+	"""
+	Helper function for get_xpath(); namespaces are passed as a tuple of (prefix, URI) tuples so that they can be part of the cache key.
+	"""
+
+	return etree.XPath(selector, namespaces=dict(namespaces))
+
+class _DefaultNamespaceTranslator(cssselect.LxmlHTMLTranslator):
+	"""
+	A cssselect translator that puts element names without a namespace prefix into a default namespace.
+	CSS selectors like `p > abbr` then match a namespaced XHTML tree, instead of one that had its xmlns declaration stripped.
+	"""
+
+	def __init__(self, default_prefix: str, xhtml: bool):
+		super().__init__(xhtml=xhtml)
+		self.default_prefix = default_prefix
+
+	def xpath_element(self, selector):
+		if selector.element and not selector.namespace:
+			selector.namespace = self.default_prefix
+
+		return super().xpath_element(selector)
+
+@lru_cache(maxsize=1024)
+def _compile_css_selector(selector: str, translator: str, namespaces: tuple, default_prefix: str) -> cssselect.CSSSelector:
+	"""
+	Helper function for get_css_selector(); namespaces are passed as a tuple of (prefix, URI) tuples so that they can be part of the cache key.
+	"""
+
+	if default_prefix:
+		translator = _DefaultNamespaceTranslator(default_prefix, xhtml=(translator == "xhtml"))
+
+	return cssselect.CSSSelector(selector, translator=translator, namespaces=dict(namespaces))
+
+def get_xpath(selector: str, namespaces: dict = None) -> etree.XPath:
+	"""
+	Get a compiled xpath expression. Expressions are compiled once and then cached, since the same ones are evaluated over and over.
+
+	INPUTS
+	selector: An xpath expression
+	namespaces: A dict of namespace prefixes to URIs; defaults to se.XHTML_NAMESPACES
+
+	OUTPUTS
+	An lxml.etree.XPath object, which can be called with an lxml element or tree to evaluate it
+	"""
+
+	return _compile_xpath(selector, tuple(sorted((namespaces or se.XHTML_NAMESPACES).items())))
+
+def get_css_selector(selector: str, translator: str = "html", namespaces: dict = None, default_prefix: str = None) -> cssselect.CSSSelector:
+	"""
+	Get a compiled CSS selector. Selectors are translated to xpath and compiled once and then cached, since the same ones are evaluated over and over.
+
+	INPUTS
+	selector: A CSS selector
+	translator: The cssselect translator to use, either "html" or "xhtml"
+	namespaces: A dict of namespace prefixes to URIs; defaults to se.XHTML_NAMESPACES
+	default_prefix: If set, the prefix in namespaces that element names without a prefix are matched in.
+	                Pass "xhtml" to query an XHTML tree without removing its default namespace declaration.
+
+	OUTPUTS
+	An lxml.cssselect.CSSSelector object, which can be called with an lxml element or tree to evaluate it.
+	Raises lxml.cssselect.ExpressionError if the selector can't be translated to xpath, like selectors with pseudo-elements.
+	"""
+
+	return _compile_css_selector(selector, translator, tuple(sorted((namespaces or se.XHTML_NAMESPACES).items())), default_prefix)
+
 class EasyXmlTree:
 	"""
 	A helper class to make some lxml operations a little less painful.
 	Represents an entire lxml tree.
 	"""
 
-	__xhtml_string = ""
 	etree = None
 
-	def __init__(self, xhtml_string: str):
-		# We have to remove the default namespace declaration from our document, otherwise
-		# xpath won't find anything at all.  See http://stackoverflow.com/questions/297239/why-doesnt-xpath-work-when-processing-an-xhtml-document-with-lxml-in-python
+	def __init__(self, xhtml: Union[str, bytes]):
+		# lxml refuses to parse a str with an encoding declaration, so str input has to be encoded first.
+		# Pass bytes, or use EasyXmlTree.from_file(), to skip that step.
+		if isinstance(xhtml, str):
+			xhtml = xhtml.encode()
+
+		self.etree = etree.fromstring(xhtml, _PARSER)
+
+	@classmethod
+	def from_file(cls, filename: str):
+		"""
+		Parse a file directly into an EasyXmlTree, without reading it into a string first.
 
-		self.__xhtml_string = xhtml_string#.replace(" xmlns=\"http://www.w3.org/1999/xhtml\"", "")
-		self.etree = etree.fromstring(str.encode(self.__xhtml_string))
+		INPUTS
+		filename: The path to an XML file
+
+		OUTPUTS
+		An EasyXmlTree representing the file
+		"""
+
+		tree = cls.__new__(cls)
+		tree.etree = etree.parse(filename, _PARSER).getroot()
+
+		return tree
 
 	def css_select(self, selector: str) -> list:
 		"""
 		Shortcut to select elements based on CSS selector.
 		"""
 
-		return self.xpath(cssselect.CSSSelector(selector, translator="html", namespaces=se.XHTML_NAMESPACES).path)
+		return list(self.css_select_iter(selector))
+
+	def css_select_iter(self, selector: str):
+		"""
+		Like css_select(), but return a generator that wraps each result as it's iterated over.
+		"""
+
+		return self.__wrap_results(get_css_selector(selector)(self.etree))
 
 	def xpath(self, selector: str) -> list:
 		"""
@@ -36,15 +133,27 @@ class EasyXmlTree:
 		For example, in content.opf we can't do xpath("//metadata").  We have to use a bogus namespace: xpath("//opf:metadata")
 		"""
 
-		result = []
+		return list(self.xpath_iter(selector))
 
-		for element in self.etree.xpath(selector, namespaces=se.XHTML_NAMESPACES):
-			if isinstance(element, str):
-				result.append(element)
-			else:
-				result.append(EasyXmlElement(element))
+	def xpath_iter(self, selector: str):
+		"""
+		Like xpath(), but return a generator that wraps each result as it's iterated over.
+		"""
 
-		return result
+		return self.__wrap_results(get_xpath(selector)(self.etree))
+
+	@staticmethod
+	def __wrap_results(results: list):
+		"""
+		Helper function used in self.xpath_iter() and self.css_select_iter()
+		Yield each result of an xpath query, wrapping elements in EasyXmlElement objects.
+		"""
+
+		for result in results:
+			if isinstance(result, str):
+				yield result
+			else:
+				yield EasyXmlElement(result)
 
 
 
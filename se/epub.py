@@ -1,14 +1,89 @@
 #!/usr/bin/env python3
 
 import os
+import mimetypes
 import zipfile
-import itertools
-import regex
+from functools import lru_cache
 import se
 import se.easy_xml
 from lxml import etree
 
 
+# Media types of the files that can be in an SE epub; other files get the media type that the `mimetypes` module guesses
+MEDIA_TYPES = {".css": "text/css", ".xhtml": "application/xhtml+xml", ".svg": "image/svg+xml", ".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".ncx": "application/x-dtbncx+xml", ".opf": "application/oebps-package+xml"}
+
+class EpubFile:
+	"""
+	An object representing a file found by get_file_inventory().
+	"""
+
+	path = ""
+	relative_path = ""
+	directory = ""
+	filename = ""
+	media_type = ""
+	size = 0
+	mtime = 0.0
+
+	def __init__(self, path: str, relative_path: str, size: int, mtime: float):
+		self.path = path
+		self.relative_path = relative_path
+		self.directory, _, self.filename = relative_path.rpartition("/")
+		self.size = size
+		self.mtime = mtime
+
+		extension = os.path.splitext(self.filename)[1].lower()
+		if extension in MEDIA_TYPES:
+			self.media_type = MEDIA_TYPES[extension]
+		else:
+			self.media_type = mimetypes.guess_type(self.filename)[0] or "application/octet-stream"
+
+def get_file_inventory(directory: str, ignored_directories: list = None) -> list:
+	"""
+	Get every file in a directory and its subdirectories, scanning each directory once.
+
+	Like os.walk(), symlinks to directories are not followed.
+
+	INPUTS
+	directory: The absolute path of the directory to scan
+	ignored_directories: A list of names of directories to skip, like ".git"
+
+	OUTPUTS
+	A list of EpubFile objects, sorted by directory and then naturally by filename. Paths relative to `directory` use "/" as a separator.
+	"""
+
+	inventory = []
+	relative_directories = [""]
+
+	while relative_directories:
+		relative_directory = relative_directories.pop()
+
+		with os.scandir(os.path.join(directory, relative_directory)) as entries:
+			for entry in entries:
+				relative_path = relative_directory + "/" + entry.name if relative_directory else entry.name
+
+				if entry.is_dir():
+					if not entry.is_symlink() and entry.name not in (ignored_directories or []):
+						relative_directories.append(relative_path)
+
+					continue
+
+				stat = entry.stat()
+				inventory.append(EpubFile(entry.path, relative_path, stat.st_size, stat.st_mtime))
+
+	inventory.sort(key=lambda file: (file.directory, se.natural_sort_key(file.filename)))
+
+	return inventory
+
+@lru_cache(maxsize=None)
+def _get_xslt_transform(xsl_filename: str) -> etree.XSLT:
+	"""
+	Helper function for convert_toc_to_ncx()
+	Compile an XSL file into a transform, once per XSL file per run.
+	"""
+
+	return etree.XSLT(etree.parse(xsl_filename))
+
 def convert_toc_to_ncx(epub_root_absolute_path: str, toc_filename: str, xsl_filename: str) -> se.easy_xml.EasyXmlTree:
 	"""
 	Take an epub3 HTML5 ToC file and convert it to an epub2 NCX file. NCX output is written to the same directory as the ToC file, in a file named "toc.ncx".
@@ -25,25 +100,26 @@ def convert_toc_to_ncx(epub_root_absolute_path: str, toc_filename: str, xsl_file
 	"""
 
 	# Use an XSLT transform to generate the NCX
-	with open(os.path.join(epub_root_absolute_path, "epub", toc_filename), "r", encoding="utf-8") as file:
-		toc_tree = se.easy_xml.EasyXmlTree(file.read())
+	toc_tree = se.easy_xml.EasyXmlTree.from_file(os.path.join(epub_root_absolute_path, "epub", toc_filename))
 
-	transform = etree.XSLT(etree.parse(xsl_filename))
+	transform = _get_xslt_transform(xsl_filename)
 	ncx_tree = transform(toc_tree.etree, cwd="'{}{}'".format(epub_root_absolute_path, os.path.sep))
+	ncx = ncx_tree.getroot()
 
-	with open(os.path.join(epub_root_absolute_path, "epub", "toc.ncx"), "w", encoding="utf-8") as file:
-		ncx_xhtml = etree.tostring(ncx_tree, encoding="unicode", pretty_print=True, with_tail=False)
-		ncx_xhtml = regex.sub(r" xml:lang=\"\?\?\"", "", ncx_xhtml)
-
-		# Make nicely incrementing navpoint IDs and playOrders
-		ncx_xhtml = regex.sub(r"<navMap id=\".*\">", "<navMap id=\"navmap\">", ncx_xhtml)
+	# The transform sets xml:lang to "??" if the ToC doesn't have a language
+	if ncx.get("{http://www.w3.org/XML/1998/namespace}lang") == "??":
+		del ncx.attrib["{http://www.w3.org/XML/1998/namespace}lang"]
 
-		counter = itertools.count(1)
-		ncx_xhtml = regex.sub(r"<navPoint id=\"id[a-z0-9]+?\"", lambda x: "<navPoint id=\"navpoint-{count}\" playOrder=\"{count}\"".format(count=next(counter)), ncx_xhtml)
+	# Make nicely incrementing navpoint IDs and playOrders
+	for nav_map in ncx.iter("{http://www.daisy.org/z3986/2005/ncx/}navMap"):
+		nav_map.set("id", "navmap")
 
-		ncx_xhtml = "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n" + ncx_xhtml
+	for count, nav_point in enumerate(ncx.iter("{http://www.daisy.org/z3986/2005/ncx/}navPoint"), start=1):
+		nav_point.set("id", "navpoint-{}".format(count))
+		nav_point.set("playOrder", str(count))
 
-		file.write(ncx_xhtml)
+	with open(os.path.join(epub_root_absolute_path, "epub", "toc.ncx"), "w", encoding="utf-8") as file:
+		file.write("<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n" + etree.tostring(ncx_tree, encoding="unicode", pretty_print=True, with_tail=False))
 
 	return toc_tree
 
@@ -64,7 +140,6 @@ def write_epub(epub_root_absolute_path: str, output_absolute_path: str) -> None:
 		epub.write(os.path.join(epub_root_absolute_path, "mimetype"), "mimetype")
 		epub.write(os.path.join(epub_root_absolute_path, "META-INF", "container.xml"), "META-INF/container.xml", compress_type=zipfile.ZIP_DEFLATED)
 
-		for root, _, files in os.walk(epub_root_absolute_path):
-			for file in files:
-				if file != "mimetype" and file != "container.xml":
-					epub.write(os.path.join(root, file), os.path.relpath(os.path.join(root, file), epub_root_absolute_path), compress_type=zipfile.ZIP_DEFLATED)
+		for file in get_file_inventory(epub_root_absolute_path):
+			if file.filename != "mimetype" and file.filename != "container.xml":
+				epub.write(file.path, file.relative_path, compress_type=zipfile.ZIP_DEFLATED)
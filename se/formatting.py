@@ -1,12 +1,106 @@
 #!/usr/bin/env python3
 
 import math
+import re
 import unicodedata
+from functools import lru_cache
 import regex
+from lxml import etree
 import se
 from titlecase import titlecase as pip_titlecase
 
 
+# Abbreviations for semanticate(), as (pattern, abbr class, function to normalize the abbreviation's text) tuples.
+# They are combined into a single regex and tried in this order, so if two patterns can match at the same place, put the preferred one first.
+SEMANTIC_ABBREVIATIONS = [
+	(r"Mr\.", None, None),
+	(r"Mrs\.", None, None),
+	(r"Ms\.", None, None),
+	(r"Dr\.", None, None),
+	(r"Drs\.", None, None),
+	(r"Prof\.", None, None),
+	(r"Rev\.", None, None),
+	(r"Hon\.", None, None),
+	(r"Lieut\.", None, None),
+	(r"Fr\.", None, None),
+	(r"Lt\.", None, None),
+	(r"Capt\.", None, None),
+	(r"Pvt\.", None, None),
+	(r"Esq\.", None, None),
+	(r"Mt\.", None, None),
+	(r"MM\.", None, None),
+	(r"Mme\.", None, None),
+	(r"Mmes\.", None, None),
+	(r"Mon\.", None, None),
+	(r"Mlle\.", None, None),
+	(r"Mdlle\.", None, None),
+	(r"Mlles\.", None, None),
+	(r"Messrs\.", None, None),
+	(r"Messers\.", None, None),
+	(r"P\.S\.", None, None),
+	(r"Co\.", None, None),
+	(r"Inc\.", None, None),
+	(r"Ltd\.", None, None),
+	(r"St\.", None, None),
+	(r"[Vv]iz\.", None, None),
+	(r"\betc\.", None, None),
+	(r"\b[Cc]f\.", None, None),
+	(r"\bp\.(?=[\s0-9])", None, None),
+	(r"\bed\.", None, None),
+	(r"[Ii]\.e\.", None, None),
+	(r"[Ee]\.g\.", None, None),
+	(r"\b[Ll]b\.", None, None),
+	(r"\b[Ll]bs\.", None, None),
+	(r"\b[Oo]z\.", None, None),
+	(r"(?:Jan|Feb|Mar|Apr|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)\.", None, None),
+	(r"No\.(?=\s+[0-9]+)", None, None),
+	(r"PhD", "degree", None),
+	(r"IOU", "initialism", None),
+	(r"A\.?D", "era", lambda text: "AD"),
+	(r"B\.?C", "era", lambda text: "BC"),
+	(r"[ap]\.\s?m\.", "time", lambda text: text[0] + ".m.")
+]
+
+# These use re instead of regex, since re is several times faster at scanning for a long alternation like this one
+_SEMANTIC_ABBREVIATION_REGEXES = [re.compile(pattern) for pattern, _, _ in SEMANTIC_ABBREVIATIONS]
+
+# Every abbreviation above must start with a match of the leading lookahead. It lets the regex engine skip most positions
+# in a text node without trying every alternative; make sure to update it when adding an abbreviation.
+_SEMANTIC_ABBREVIATION_REGEX = re.compile(r"(?=[A-Z]|\b[celop]|[ieap]\.|viz)(?:" + "|".join(pattern for pattern, _, _ in SEMANTIC_ABBREVIATIONS) + ")")
+
+# Roman numerals of two or more characters, or single X or V characters; we can't do I for obvious reasons.
+# Numerals at the very start of a text node are skipped, so that we don't wrap numerals that are already wrapped in a tag.
+_ROMAN_NUMERAL_REGEX = regex.compile(r"(?<=[^a-zA-Z])[ixvIXV]{2,}\b|(?<=[^a-zA-Z\"])[vxVX]\b")
+
+_ABBREVIATION_EOC_REGEX = regex.compile(r"[a-zA-Z\.]+?\.")
+_ABBREVIATION_ETC_EOC_REGEX = regex.compile(r"\s+[A-Z]")
+
+# Used by titlecase(), in the order they're applied
+_TITLECASE_HTML_TAG_REGEX = regex.compile(r"<(/?)([^>]+?)>")
+_TITLECASE_D_APOSTROPHE_REGEX = regex.compile(r"\bD’([A-Z]+?)")
+_TITLECASE_AND_OR_REGEX = regex.compile(r"([^a-zA-Z]) (And|Or)\b")
+_TITLECASE_PARENTHESIZED_PREPOSITION_REGEX = regex.compile(r"\((For|Of|To)(.*?)\)(.+?)")
+_TITLECASE_AND_WORD_JOINER_REGEX = regex.compile(r"\bAnd{}".format(se.WORD_JOINER))
+_TITLECASE_IN_REGEX = regex.compile(r"\b; In\b")
+_TITLECASE_FROM_WITH_REGEX = regex.compile(r"(?<!^)(?<!\()\b(From|With)\b")
+_TITLECASE_WORK_TITLE_REGEX = regex.compile(r"(‘|“|<i.*?epub:type=\".*?se:.*?\".*?>)([a-z])")
+_TITLECASE_VS_THE_REGEX = regex.compile(r"(?:vs\.) The\b")
+_TITLECASE_NAME_PARTICLE_REGEX = regex.compile(r"(?<!^|“)\b(De|Von|Van|Le)\b")
+_TITLECASE_OR_SUBTITLE_REGEX = regex.compile(r"\bOr, ([a-z])")
+
+# Used by make_url_safe()
+_URL_SAFE_MARK_REGEX = regex.compile(r"\p{M}")
+_URL_SAFE_APOSTROPHE_REGEX = regex.compile(r"['‘’]")
+_URL_SAFE_NON_ALPHANUMERIC_REGEX = regex.compile(r"[^0-9a-z]", flags=regex.IGNORECASE)
+_URL_SAFE_WHITESPACE_REGEX = regex.compile(r"\s+")
+_URL_SAFE_TRAILING_DASH_REGEX = regex.compile(r"\-+$")
+
+# Used by convert_british_quotes()
+_QUOTE_REGEX = regex.compile(r"[“”‘’]")
+_AMERICAN_QUOTE_STYLE_THRESHOLD = 80
+
+
+
 def remove_tags(text: str) -> str:
 	"""
 	Remove all HTML tags from a string.
@@ -34,10 +128,13 @@ def ordinal(number: str) -> str:
 	number = int(number)
 	return "%d%s" % (number, "tsnrhtdd"[(math.floor(number / 10) % 10 != 1) * (number % 10 < 4) * number % 10::4])
 
+@lru_cache(maxsize=4096)
 def titlecase(text: str) -> str:
 	"""
 	Titlecase a string according to SE house style.
 
+	Results are cached, since the same titles and headings tend to be titlecased over and over.
+
 	INPUTS
 	text: The string to titlecase
 
@@ -51,40 +148,39 @@ def titlecase(text: str) -> str:
 
 	# Lowercase HTML tags that titlecase might have screwed up. We just lowercase the entire contents of the tag, including attributes,
 	# since they're typically lowercased anyway. (Except for things like `alt`, but we won't be titlecasing images!)
-	text = regex.sub(r"<(/?)([^>]+?)>", lambda result: "<" + result.group(1) + result.group(2).lower() + ">", text)
+	text = _TITLECASE_HTML_TAG_REGEX.sub(lambda result: "<" + result.group(1) + result.group(2).lower() + ">", text)
 
 	# Lowercase leading "d', as in "Marie d'Elle"
-	text = regex.sub(r"\bD’([A-Z]+?)", "d’\\1", text)
+	text = _TITLECASE_D_APOSTROPHE_REGEX.sub("d’\\1", text)
 
 	# Lowercase "and", even if preceded by punctuation
-	text = regex.sub(r"([^a-zA-Z]) (And|Or)\b", lambda result: result.group(1) + " " + result.group(2).lower(), text)
+	text = _TITLECASE_AND_OR_REGEX.sub(lambda result: result.group(1) + " " + result.group(2).lower(), text)
 
 	# pip_titlecase capitalizes *all* prepositions preceded by parenthesis; we only want to capitalize ones that *aren't the first word of a subtitle*
 	# OK: From Sergeant Bulmer (of the Detective Police) to Mr. Pendril
 	# OK: Three Men in a Boat (To Say Nothing of the Dog)
-	text = regex.sub(r"\((For|Of|To)(.*?)\)(.+?)", lambda result: "(" + result.group(1).lower() + result.group(2) + ")" + result.group(3), text)
+	text = _TITLECASE_PARENTHESIZED_PREPOSITION_REGEX.sub(lambda result: "(" + result.group(1).lower() + result.group(2) + ")" + result.group(3), text)
 
 	# Lowercase "and", if followed by a word-joiner
-	regex_string = r"\bAnd{}".format(se.WORD_JOINER)
-	text = regex.sub(regex_string, "and{}".format(se.WORD_JOINER), text)
+	text = _TITLECASE_AND_WORD_JOINER_REGEX.sub("and{}".format(se.WORD_JOINER), text)
 
 	# Lowercase "in", if followed by a semicolon (but not words like "inheritance")
-	text = regex.sub(r"\b; In\b", "; in", text)
+	text = _TITLECASE_IN_REGEX.sub("; in", text)
 
 	# Lowercase "from", "with", as long as they're not the first word and not preceded by a parenthesis
-	text = regex.sub(r"(?<!^)(?<!\()\b(From|With)\b", lambda result: result.group(1).lower(), text)
+	text = _TITLECASE_FROM_WITH_REGEX.sub(lambda result: result.group(1).lower(), text)
 
 	# Capitalise the first word after an opening quote or italicisation that signifies a work
-	text = regex.sub(r"(‘|“|<i.*?epub:type=\".*?se:.*?\".*?>)([a-z])", lambda result: result.group(1) + result.group(2).upper(), text)
+	text = _TITLECASE_WORK_TITLE_REGEX.sub(lambda result: result.group(1) + result.group(2).upper(), text)
 
 	# Lowercase "the" if preceded by "vs."
-	text = regex.sub(r"(?:vs\.) The\b", "vs. the", text)
+	text = _TITLECASE_VS_THE_REGEX.sub("vs. the", text)
 
 	# Lowercase "de", "von", "van", "le", as in "Charles de Gaulle", "Werner von Braun", etc., and if not the first word and not preceded by an &ldquo;
-	text = regex.sub(r"(?<!^|“)\b(De|Von|Van|Le)\b", lambda result: result.group(1).lower(), text)
+	text = _TITLECASE_NAME_PARTICLE_REGEX.sub(lambda result: result.group(1).lower(), text)
 
 	# Uppercase word following "Or,", since it is probably a subtitle
-	text = regex.sub(r"\bOr, ([a-z])", lambda result: "Or, " + result.group(1).upper(), text)
+	text = _TITLECASE_OR_SUBTITLE_REGEX.sub(lambda result: "Or, " + result.group(1).upper(), text)
 
 	# Fix html entities
 	text = text.replace("&Amp;", "&amp;")
@@ -94,6 +190,31 @@ def titlecase(text: str) -> str:
 
 	return text
 
+def titlecase_many(texts) -> list:
+	"""
+	Titlecase many strings according to SE house style. See titlecase().
+
+	Strings that repeat, like running heads or "Chapter" headings, are only titlecased once.
+
+	INPUTS
+	texts: An iterable of strings to titlecase
+
+	OUTPUTS
+	A list of titlecased versions of the input strings, in the same order
+	"""
+
+	titlecased_texts = {}
+	output = []
+
+	for text in texts:
+		if text not in titlecased_texts:
+			titlecased_texts[text] = titlecase(text)
+
+		output.append(titlecased_texts[text])
+
+	return output
+
+@lru_cache(maxsize=4096)
 def make_url_safe(text: str) -> str:
 	"""
 	Return a URL-safe version of the input. For example, the string "Mother's Day" becomes "mothers-day".
@@ -106,7 +227,7 @@ def make_url_safe(text: str) -> str:
 	"""
 
 	# 1. Convert accented characters to unaccented characters
-	text = regex.sub(r"\p{M}", "", unicodedata.normalize("NFKD", text))
+	text = _URL_SAFE_MARK_REGEX.sub("", unicodedata.normalize("NFKD", text))
 
 	# 2. Trim
 	text = text.strip()
@@ -115,15 +236,601 @@ def make_url_safe(text: str) -> str:
 	text = text.lower()
 
 	# 4. Remove apostrophes
-	text = regex.sub(r"['‘’]", "", text)
+	text = _URL_SAFE_APOSTROPHE_REGEX.sub("", text)
 
 	# 5. Convert any non-digit, non-letter character to a space
-	text = regex.sub(r"[^0-9a-z]", " ", text, flags=regex.IGNORECASE)
+	text = _URL_SAFE_NON_ALPHANUMERIC_REGEX.sub(" ", text)
 
 	# 6. Convert any instance of one or more space to a dash
-	text = regex.sub(r"\s+", "-", text)
+	text = _URL_SAFE_WHITESPACE_REGEX.sub("-", text)
 
 	# 7. Remove trailing dashes
-	text = regex.sub(r"\-+$", "", text)
+	text = _URL_SAFE_TRAILING_DASH_REGEX.sub("", text)
 
 	return text
+
+def _get_local_name(element) -> str:
+	"""
+	Return the tag name of an lxml element without its namespace, or an empty string for comments and processing instructions.
+	"""
+
+	if not isinstance(element.tag, str):
+		return ""
+
+	return etree.QName(element).localname
+
+def _parse_xhtml(xhtml: str):
+	"""
+	Parse an XHTML string into an lxml tree, raising an SeError if it isn't well-formed.
+	"""
+
+	try:
+		return etree.fromstring(str.encode(xhtml))
+	except etree.XMLSyntaxError as ex:
+		raise se.SeError("Couldn’t parse XHTML: {}".format(ex))
+
+def _serialize_xhtml(root, xhtml: str) -> str:
+	"""
+	Serialize an lxml tree parsed from an XHTML string back into a string, keeping the original's prolog and final newline.
+	"""
+
+	# lxml writes empty elements as self-closing tags, which browsers don't understand for elements like <td>
+	for element in root.iter("{*}*"):
+		if element.text is None and not len(element) and _get_local_name(element) not in se.XHTML_VOID_ELEMENTS:
+			element.text = ""
+
+	# Keep the original XML declaration and anything else before the root element, since lxml would rewrite it
+	prolog = xhtml[:regex.search(r"<(?![?!])", xhtml).start()]
+
+	return prolog + etree.tostring(root, encoding=str) + ("\n" if xhtml.endswith("\n") else "")
+
+def _split_text(element, text: str, pattern, create_element) -> tuple:
+	"""
+	Split a text node into the text before the first match of a regex, and a list of new elements for each match,
+	with any text following each match set as that element's tail.
+
+	INPUTS
+	element: An lxml element in the tree the new elements will be added to
+	text: The text node's contents
+	pattern: A compiled regex
+	create_element: A function that takes an lxml element and a regex match, and returns a new lxml element for the match
+
+	OUTPUTS
+	A tuple of (the text before the first match, a list of new lxml elements)
+	"""
+
+	new_elements = []
+	leading_text = text
+	previous_element = None
+	position = 0
+
+	for match in pattern.finditer(text):
+		if previous_element is None:
+			leading_text = text[position:match.start()]
+		else:
+			previous_element.tail = text[position:match.start()] or None
+
+		previous_element = create_element(element, match)
+		new_elements.append(previous_element)
+		position = match.end()
+
+	if previous_element is not None:
+		previous_element.tail = text[position:] or None
+
+	return leading_text, new_elements
+
+def _wrap_text_matches(element, pattern, create_element, skip_element) -> bool:
+	"""
+	Recursively wrap all matches of a regex in the text nodes of an lxml element in new elements.
+
+	INPUTS
+	element: An lxml element
+	pattern: A compiled regex
+	create_element: A function that takes an lxml element and a regex match, and returns a new lxml element for the match
+	skip_element: A function that takes an lxml element and returns True if the text inside it should be left alone
+
+	OUTPUTS
+	True if any matches were wrapped, False otherwise
+	"""
+
+	changed = False
+	children = list(element)
+
+	if element.text:
+		leading_text, new_elements = _split_text(element, element.text, pattern, create_element)
+		if new_elements:
+			element.text = leading_text or None
+			element[0:0] = new_elements
+			changed = True
+
+	for child in children:
+		if _get_local_name(child) and not skip_element(child):
+			changed = _wrap_text_matches(child, pattern, create_element, skip_element) or changed
+
+		if child.tail:
+			leading_text, new_elements = _split_text(element, child.tail, pattern, create_element)
+			if new_elements:
+				child.tail = leading_text or None
+				index = element.index(child) + 1
+				element[index:index] = new_elements
+				changed = True
+
+	return changed
+
+def _create_abbreviation(element, match):
+	"""
+	Create an <abbr> element for a match of _SEMANTIC_ABBREVIATION_REGEX.
+	"""
+
+	# The combined regex tries the abbreviations in order, so the first one that matches here is the one that was found
+	index = next(index for index, pattern in enumerate(_SEMANTIC_ABBREVIATION_REGEXES) if pattern.match(match.string, match.start()))
+	_, abbr_class, normalize = SEMANTIC_ABBREVIATIONS[index]
+
+	abbr = element.makeelement(etree.QName(element, "abbr"), {})
+	abbr.text = normalize(match.group()) if normalize else match.group()
+
+	if abbr_class:
+		abbr.set("class", abbr_class)
+
+	return abbr
+
+def _create_roman_numeral(element, match):
+	"""
+	Create a <span epub:type="z3998:roman"> element for a match of _ROMAN_NUMERAL_REGEX.
+	"""
+
+	span = element.makeelement(etree.QName(element, "span"), {"{{{}}}type".format(se.XHTML_NAMESPACES["epub"]): "z3998:roman"})
+	span.text = match.group()
+
+	return span
+
+def semanticate_tree(root) -> bool:
+	"""
+	Add semantics to an XHTML tree in place: wrap common abbreviations in <abbr> elements and Roman numerals in
+	<span epub:type="z3998:roman"> elements. Only text in the <body> is changed; text already inside <abbr> elements is skipped.
+
+	INPUTS
+	root: The lxml root element of an XHTML file
+
+	OUTPUTS
+	True if the tree was changed, False otherwise
+	"""
+
+	changed = False
+
+	# We may have added HTML tags within title tags in the past.  Remove those here
+	for title in root.iterfind("{*}head/{*}title"):
+		if len(title):
+			title.text = "".join(title.itertext())
+			for child in title:
+				title.remove(child)
+			changed = True
+
+	body = root.find("{*}body")
+	if body is None:
+		return changed
+
+	changed = _wrap_text_matches(body, _SEMANTIC_ABBREVIATION_REGEX, _create_abbreviation, lambda element: _get_local_name(element) == "abbr") or changed
+
+	# Clean up nesting errors
+	for abbr in list(body.iterfind(".//{*}abbr[@class='eoc']")):
+		if not abbr.text and len(abbr) == 1 and _get_local_name(abbr[0]) == "abbr" and not abbr[0].attrib and not len(abbr[0]) and not abbr[0].tail:
+			abbr.text = abbr[0].text
+			abbr.remove(abbr[0])
+			changed = True
+
+	# Guess at adding eoc class
+	for abbr in body.iterfind(".//{*}abbr"):
+		if abbr.attrib or len(abbr) or not abbr.text:
+			continue
+
+		parent = abbr.getparent()
+		if (not abbr.tail and _get_local_name(parent) == "p" and parent[-1] is abbr and _ABBREVIATION_EOC_REGEX.fullmatch(abbr.text)) or (abbr.text == "etc." and abbr.tail and _ABBREVIATION_ETC_EOC_REGEX.match(abbr.tail)):
+			abbr.set("class", "eoc")
+			changed = True
+
+	# Like abbreviations, Roman numerals are left alone inside <abbr> elements, as well as inside existing Roman numeral spans
+	changed = _wrap_text_matches(body, _ROMAN_NUMERAL_REGEX, _create_roman_numeral, lambda element: _get_local_name(element) == "abbr" or "z3998:roman" in element.get("{{{}}}type".format(se.XHTML_NAMESPACES["epub"]), "").split()) or changed
+
+	return changed
+
+def semanticate(xhtml: str) -> str:
+	"""
+	Add semantics to an XHTML string. See semanticate_tree().
+
+	INPUTS
+	xhtml: A string of XHTML
+
+	OUTPUTS
+	A string of XHTML with semantics added; the input string itself if nothing was changed
+	"""
+
+	root = _parse_xhtml(xhtml)
+
+	if not semanticate_tree(root):
+		return xhtml
+
+	return _serialize_xhtml(root, xhtml)
+
+class QuoteAmbiguity:
+	"""
+	An object representing a quote that convert_british_quotes() had to guess at, and that should be proofread.
+	"""
+
+	line = 0
+	text = ""
+	reason = ""
+
+	def __init__(self, line: int, text: str, reason: str):
+		self.line = line
+		self.text = text
+		self.reason = reason
+
+def _get_text_nodes(element, paragraph, line: int, text_nodes: list) -> int:
+	"""
+	Recursively collect the text nodes of an lxml element in document order.
+
+	INPUTS
+	element: An lxml element
+	paragraph: The <p> element this element is in, or None
+	line: The line number in the source file that the element's text starts on
+	text_nodes: A list to append [element, is_tail, text, is_followed_by_end_tag, paragraph, line] lists to
+
+	OUTPUTS
+	The line number that the element's tail starts on
+	"""
+
+	line = element.sourceline or line
+
+	if _get_local_name(element) == "p":
+		paragraph = element
+
+	if element.text:
+		text_nodes.append([element, False, element.text, not len(element), paragraph, line])
+		line += element.text.count("\n")
+
+	for child in element:
+		if isinstance(child.tag, str):
+			line = _get_text_nodes(child, paragraph, line, text_nodes)
+
+		if child.tail:
+			text_nodes.append([child, True, child.tail, child is element[-1], paragraph, line])
+			line += child.tail.count("\n")
+
+	return line
+
+def _is_before_space_or_end_tag(text: str, position: int, is_followed_by_end_tag: bool) -> bool:
+	"""
+	Return True if the character at a position in a text node is followed by whitespace, or is the last character before an end tag.
+	"""
+
+	if position + 1 < len(text):
+		return text[position + 1].isspace()
+
+	return is_followed_by_end_tag
+
+class _BritishQuoteConverter:
+	"""
+	Classify the quotes in a list of text nodes from _get_text_nodes(), and convert them from British to American quote style.
+
+	Right single quotes are the hard part, since they may be apostrophes or closing quotes; when they are guessed to be
+	a closing quote from context alone, the guess is recorded as an ambiguity so that it can be proofread.
+	"""
+
+	def __init__(self, text_nodes: list):
+		self.text_nodes = text_nodes
+
+		# The converted characters of each text node that has quotes in it, or None; deleted characters are set to ""
+		self.converted = [None] * len(text_nodes)
+
+		# (node index, position, reason) tuples, turned into QuoteAmbiguity objects by get_ambiguities()
+		self.ambiguities = []
+
+		# To guess the quote style, count the paragraphs whose first opening quote is double or single
+		self.paragraphs_seen = set()
+		self.double_quote_count = 0
+		self.single_quote_count = 0
+
+		# Right single quotes closed by the context right around them, before the guesses further down.
+		# Like the guessed closing quotes, these end the current quotation.
+		self.certain_closing_quotes = set()
+
+		# State for the current quotation opened by a left single quote, if any
+		self.quote_start = None
+		self.latest_quote_start = None
+		self.quote_paragraph = None
+		self.fallback_closing_quote = None
+		self.apostrophe_count = 0
+
+		# A quotation that was just ended by a quote, and the position of that quote. A right single quote directly after
+		# that quote can still be guessed to close the quotation, like the last quote in ‘He said “Go”’ followed by a space.
+		self.ended_quotation = None
+
+		# For the report: the last guessed closing quote, the start of a quotation that a nested quotation ended before it
+		# was closed, and whether the open quotation has already been reported
+		self.guessed_closing_quote = None
+		self.interrupted_quote_start = None
+		self.is_quotation_reported = False
+		self.current_paragraph = None
+
+	def _add_ambiguity(self, node_index: int, position: int, reason: str) -> None:
+		self.ambiguities.append((node_index, position, reason))
+
+	def _end_quotation(self, ending_quote: tuple = None) -> None:
+		"""
+		End the current quotation, optionally at a quote that a right single quote directly after it can still close the quotation at.
+		"""
+
+		# With no better closing quote, a right single quote after an "s" and before certain punctuation, like "boys’!", closes the quotation
+		if self.fallback_closing_quote is not None:
+			node_index, position = self.fallback_closing_quote
+			self.converted[node_index][position] = "”"
+			self._add_ambiguity(node_index, position, "Guessed closing quote after “s”; it may be a possessive.")
+
+		self.ended_quotation = (self.quote_start, self.quote_paragraph, self.apostrophe_count, ending_quote) if ending_quote else None
+		self.quote_start = None
+		self.fallback_closing_quote = None
+
+	def _end_paragraph(self) -> None:
+		"""
+		Report the quotations left open at the end of the current paragraph.
+		"""
+
+		# A quotation may continue into the next paragraph, but if it has no closing quote and an apostrophe, that apostrophe may be the closing quote
+		if self.quote_start is not None and self.apostrophe_count and not self.is_quotation_reported and (self.fallback_closing_quote is None or self.text_nodes[self.fallback_closing_quote[0]][4] is not self.current_paragraph):
+			self._add_ambiguity(self.latest_quote_start[0], self.latest_quote_start[1], "No closing quote found in this paragraph; an apostrophe in this quotation may be the closing quote.")
+			self.is_quotation_reported = True
+
+		if self.interrupted_quote_start is not None:
+			self._add_ambiguity(self.interrupted_quote_start[0], self.interrupted_quote_start[1], "No closing quote found after a nested quotation.")
+
+		self.guessed_closing_quote = None
+		self.interrupted_quote_start = None
+
+	def _convert_left_double_quote(self, node_index: int, position: int) -> None:
+		self.converted[node_index][position] = "‘"
+
+		# A nested quotation ends the guesses for the quotation it's in
+		if self.quote_start is not None:
+			self.interrupted_quote_start = self.quote_start
+			self._end_quotation((node_index, position))
+
+	def _convert_left_single_quote(self, node_index: int, position: int, paragraph) -> None:
+		self.converted[node_index][position] = "“"
+
+		# The guesses measure from the first opening quote, but the report is about the latest one
+		if self.quote_start is None:
+			self.quote_start = (node_index, position)
+
+		self.latest_quote_start = (node_index, position)
+		self.quote_paragraph = paragraph
+		self.apostrophe_count = 0
+		self.is_quotation_reported = False
+		self.guessed_closing_quote = None
+
+	def _is_certain_closing_quote(self, node_index: int, position: int, character: str, previous_character: str) -> bool:
+		"""
+		Return True if the characters right around a right quote show that it's a closing quote.
+		"""
+
+		text = self.text_nodes[node_index][2]
+		is_followed_by_end_tag = self.text_nodes[node_index][3]
+
+		if character == "’" and text[max(0, position - 3):position] == "”" + se.WORD_JOINER + "\u2009" and _is_before_space_or_end_tag(text, position, is_followed_by_end_tag):
+			# A closing single quote after a closing double quote, like ”⁠ ’; the word joiner goes, since the quotes swap places
+			self.converted[node_index][position - 2] = ""
+			return True
+
+		if character == "’" and previous_character in ".,!?…:;":
+			return True
+
+		if character == "’" and previous_character == "—" and _is_before_space_or_end_tag(text, position, is_followed_by_end_tag):
+			return True
+
+		# Two right single quotes separated by a hair space, like ’ ’
+		return previous_character == se.HAIR_SPACE and position >= 2 and text[position - 2] in "”’" and (node_index, position - 2) not in self.certain_closing_quotes
+
+	def _convert_right_quote(self, node_index: int, position: int, character: str, paragraph, previous_quotation) -> None:
+		text = self.text_nodes[node_index][2]
+		is_followed_by_end_tag = self.text_nodes[node_index][3]
+
+		# Both kinds of right quote become right single quotes, except for the right single quotes that are closing quotes.
+		# Text nodes are separated by tags, so the characters on either side of a node act like the ends of a tag.
+		self.converted[node_index][position] = "’"
+		previous_character = text[position - 1] if position > 0 else ">"
+		next_character = text[position + 1] if position + 1 < len(text) else "<"
+
+		if character == "”" and text[position + 1:position + 4] == se.WORD_JOINER + "\u2009’" and _is_before_space_or_end_tag(text, position + 3, is_followed_by_end_tag):
+			# The word joiner in ”⁠ ’ is removed below
+			next_character = "\u2009"
+
+		# First, right single quotes that the characters around them show are closing quotes
+		if self._is_certain_closing_quote(node_index, position, character, previous_character):
+			self.converted[node_index][position] = "”"
+			self.certain_closing_quotes.add((node_index, position))
+			self.interrupted_quote_start = None
+
+			if self.quote_start is not None:
+				self._end_quotation((node_index, position))
+			elif self.guessed_closing_quote is not None:
+				self._add_ambiguity(self.guessed_closing_quote[0], self.guessed_closing_quote[1], "Guessed closing quote, but a later closing quote suggests it’s an apostrophe.")
+				self.guessed_closing_quote = None
+
+			return
+
+		if self.quote_start is not None:
+			quotation = (self.quote_start, self.quote_paragraph, self.apostrophe_count)
+		elif previous_quotation is not None:
+			quotation = previous_quotation
+		else:
+			return
+
+		# Then, guess that the first right single quote in a quotation that's followed by a space or certain punctuation,
+		# and isn't after an "s", is the closing quote
+		if (node_index != quotation[0][0] or position - quotation[0][1] >= 3) and previous_character != "s" and (next_character.isspace() or next_character in "!?:;)"):
+			self.converted[node_index][position] = "”"
+
+			if quotation[1] is not paragraph:
+				self._add_ambiguity(node_index, position, "Guessed closing quote for a quotation that starts in an earlier paragraph.")
+			elif quotation[2]:
+				self._add_ambiguity(node_index, position, "Guessed closing quote; an earlier apostrophe in this quotation may be the closing quote.")
+			else:
+				self.guessed_closing_quote = (node_index, position)
+
+			self.interrupted_quote_start = None
+
+			if self.quote_start is not None:
+				self._end_quotation()
+
+		elif self.quote_start is not None:
+			if self.fallback_closing_quote is None and next_character in "!?:;)" and (node_index != self.quote_start[0] or position - self.quote_start[1] >= 2):
+				self.fallback_closing_quote = (node_index, position)
+
+			if character == "’" and previous_character.isalpha() and not next_character.isalpha():
+				self.apostrophe_count += 1
+
+	def convert(self) -> None:
+		"""
+		Classify and convert every quote, in a single pass over the text nodes.
+		"""
+
+		for node_index, (_, _, text, _, paragraph, _) in enumerate(self.text_nodes):
+			if paragraph is not self.current_paragraph:
+				if self.current_paragraph is not None:
+					self._end_paragraph()
+				self.current_paragraph = paragraph
+
+			for match in _QUOTE_REGEX.finditer(text):
+				if self.converted[node_index] is None:
+					self.converted[node_index] = list(text)
+
+				position = match.start()
+				character = match.group()
+
+				previous_quotation = None
+				if self.ended_quotation is not None and self.ended_quotation[3] == (node_index, position - 1):
+					previous_quotation = self.ended_quotation[:3]
+				self.ended_quotation = None
+
+				if character in "“‘" and paragraph is not None and paragraph not in self.paragraphs_seen:
+					self.paragraphs_seen.add(paragraph)
+					if character == "“":
+						self.double_quote_count += 1
+					else:
+						self.single_quote_count += 1
+
+				if character == "“":
+					self._convert_left_double_quote(node_index, position)
+				elif character == "‘":
+					self._convert_left_single_quote(node_index, position, paragraph)
+				else:
+					self._convert_right_quote(node_index, position, character, paragraph, previous_quotation)
+
+		if self.current_paragraph is not None:
+			self._end_paragraph()
+
+		if self.quote_start is not None:
+			self._end_quotation()
+
+	def get_style(self) -> str:
+		"""
+		Return the detected quote style, either "american", "british", or "unsure".
+		"""
+
+		if not self.double_quote_count + self.single_quote_count:
+			return "unsure"
+
+		american_percentage = self.double_quote_count / (self.double_quote_count + self.single_quote_count) * 100
+
+		if american_percentage >= _AMERICAN_QUOTE_STYLE_THRESHOLD:
+			return "american"
+
+		if 100 - american_percentage >= _AMERICAN_QUOTE_STYLE_THRESHOLD:
+			return "british"
+
+		return "unsure"
+
+	def get_ambiguities(self) -> list:
+		"""
+		Return a list of QuoteAmbiguity objects for the guessed quotes, sorted by line.
+		"""
+
+		ambiguities = []
+		for node_index, position, reason in self.ambiguities:
+			line = self.text_nodes[node_index][5] + self.text_nodes[node_index][2].count("\n", 0, position)
+			context = regex.sub(r"\s+", " ", "".join(self.converted[node_index][max(0, position - 30):position + 30])).strip()
+			ambiguities.append(QuoteAmbiguity(line, context, reason))
+
+		ambiguities.sort(key=lambda ambiguity: ambiguity.line)
+
+		return ambiguities
+
+	def apply(self) -> None:
+		"""
+		Set the converted text on the tree's elements.
+		"""
+
+		for (element, is_tail, text, _, _, _), characters in zip(self.text_nodes, self.converted):
+			if characters is None:
+				continue
+
+			new_text = "".join(characters)
+			if new_text != text:
+				if is_tail:
+					element.tail = new_text
+				else:
+					element.text = new_text
+
+def convert_british_quotes_tree(root, force: bool = False) -> tuple:
+	"""
+	Convert British quote style to American quote style in the text of an XHTML tree, in place.
+	Quotes must already be typogrified.
+
+	Each quote is classified once, in a single pass over the tree's text nodes. Right single quotes are the hard part,
+	since they may be apostrophes or closing quotes; when they are guessed to be a closing quote from context alone,
+	the guess is returned so that it can be proofread.
+
+	INPUTS
+	root: The lxml root element of an XHTML file
+	force: Convert the tree even if it looks like it already uses American quote style
+
+	OUTPUTS
+	A tuple of (the detected quote style, either "american", "british", or "unsure"; a list of QuoteAmbiguity objects).
+	If the detected style is "american" and force is False, the tree is not changed and the list is empty.
+	"""
+
+	text_nodes = []
+	_get_text_nodes(root, None, 1, text_nodes)
+
+	converter = _BritishQuoteConverter(text_nodes)
+	converter.convert()
+
+	style = converter.get_style()
+
+	if style == "american" and not force:
+		return style, []
+
+	converter.apply()
+
+	return style, converter.get_ambiguities()
+
+def convert_british_quotes(xhtml: str, force: bool = False) -> tuple:
+	"""
+	Convert British quote style to American quote style in an XHTML string. See convert_british_quotes_tree().
+
+	INPUTS
+	xhtml: A string of XHTML
+	force: Convert the string even if it looks like it already uses American quote style
+
+	OUTPUTS
+	A tuple of (the converted XHTML string; the detected quote style; a list of QuoteAmbiguity objects)
+	"""
+
+	root = _parse_xhtml(xhtml)
+
+	style, ambiguities = convert_british_quotes_tree(root, force)
+
+	if style == "american" and not force:
+		return xhtml, style, ambiguities
+
+	return _serialize_xhtml(root, xhtml), style, ambiguities
@@ -29,6 +29,7 @@ from __future__ import unicode_literals, division, absolute_import, print_functi
 
 import sys
 import codecs
+import logging
 
 PY2 = sys.version_info[0] == 2
 PY3 = sys.version_info[0] == 3
@@ -276,3 +277,19 @@ def add_cp65001_codec():
             codecs.register(
                 lambda name: name == 'cp65001' and codecs.lookup('utf-8') or None)
     return
+
+# kindleunpack reports its progress with print(), which is neither thread safe nor
+# easy to silence when used as a library.  Modules import logprint as print so that
+# all of that output goes to the 'se.kindleunpack' logger instead of to stdout.
+logger = logging.getLogger('se.kindleunpack')
+
+def logprint(*args, **kwargs):
+    message = kwargs.get('sep', ' ').join([text_type(arg) for arg in args]).strip('\n')
+    if not message.strip():
+        return
+    if message.lstrip().startswith('Error'):
+        logger.error(message)
+    elif message.lstrip().startswith('Warning'):
+        logger.warning(message)
+    else:
+        logger.info(message)
@@ -13,6 +13,7 @@ import traceback
 from .compatibility_utils import PY2, binary_type, utf8_str, unicode_str
 from .compatibility_utils import unicode_argv, add_cp65001_codec
 from .compatibility_utils import hexlify
+from .compatibility_utils import logprint as print
 
 add_cp65001_codec()
 
@@ -172,6 +173,7 @@ import struct
 import re
 import zlib
 import getopt
+import logging
 
 class unpackException(Exception):
     pass
@@ -179,7 +181,7 @@ class unpackException(Exception):
 
 # import the kindleunpack support libraries
 from .unpack_structure import fileNames
-from .mobi_sectioner import Sectionizer, describe
+from .mobi_sectioner import Sectionizer, HeaderSectionizer, describe
 from .mobi_header import MobiHeader, dump_contexth
 from .mobi_utils import toBase32
 from .mobi_opf import OPFProcessor
@@ -923,6 +925,24 @@ def unpackBook(infile, outdir, apnxfile=None, epubver='2', use_hd=False, dodump=
     return
 
 
+def probe(infile):
+    """
+    Read the metadata of a mobi or azw3 ebook without unpacking it.
+
+    Only the Palm DB header, record 0 and its EXTH block are read; the text
+    records are never loaded or decompressed.  Returns a dict mapping each
+    metadata name (e.g. 'Title', 'Creator', 'ASIN', 'Language') to a list of values.
+    """
+    sect = HeaderSectionizer(unicode_str(infile))
+    try:
+        if sect.ident != b'BOOKMOBI' and sect.ident != b'TEXtREAd':
+            raise unpackException('Invalid file format')
+        mh = MobiHeader(sect, 0, headerOnly=True)
+        return dict(mh.getMetaData())
+    finally:
+        sect.close()
+
+
 def usage(progname):
     print("")
     print("Description:")
@@ -947,6 +967,9 @@ def main(argv=unicode_argv()):
     global WRITE_RAW_DATA
     global SPLIT_COMBO_MOBIS
 
+    # print() is routed through the logging module, so show it on the console
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
     print("KindleUnpack v0.80")
     print("   Based on initial mobipocket version Copyright © 2009 Charles M. Hannum <root@ihack.net>")
     print("   Extensive Extensions and Improvements Copyright © 2009-2014 ")
@@ -5,21 +5,20 @@
 from __future__ import unicode_literals, division, absolute_import, print_function
 
 from .compatibility_utils import PY2, PY3, utf8_str, bstr, bchr
+from .compatibility_utils import logprint as print
 
 if PY2:
     range = xrange
-    array_format = b'B'
 if PY3:
     unichr = chr
-    array_format = "B"
 
-import array
+from bisect import bisect_right
 
 import struct
 # note:  struct pack, unpack, unpack_from all require bytestring format
 # data all the way up to at least python 2.7.5, python 3 okay with bytestring
 
-from .mobi_index import getVariableWidthValue, readTagSection, getTagMap
+from .mobi_index import getVariableWidthValue, readTagSection, compileTagTable, decodeTagMap
 from .mobi_utils import toHex
 
 DEBUG_DICT = False
@@ -30,21 +29,24 @@ class InflectionData(object):
         self.infldatas = infldatas
         self.starts = []
         self.counts = []
+        # ends[i] is the first value past inflection data section i, so a value can be
+        # mapped to its section by bisection
+        self.ends = []
+        end = 0
         for idata in self.infldatas:
             start, = struct.unpack_from(b'>L', idata, 0x14)
             count, = struct.unpack_from(b'>L', idata, 0x18)
             self.starts.append(start)
             self.counts.append(count)
+            end += count
+            self.ends.append(end)
 
     def lookup(self, lookupvalue):
-        i = 0
-        rvalue = lookupvalue
-        while rvalue >= self.counts[i]:
-            rvalue = rvalue - self.counts[i]
-            i += 1
-            if i == len(self.counts):
-                print("Error: Problem with multiple inflections data sections")
-                return lookupvalue, self.starts[0], self.counts[0], self.infldatas[0]
+        i = bisect_right(self.ends, lookupvalue)
+        if i == len(self.ends):
+            print("Error: Problem with multiple inflections data sections")
+            return lookupvalue, self.starts[0], self.counts[0], self.infldatas[0]
+        rvalue = lookupvalue - (self.ends[i] - self.counts[i])
         return rvalue, self.starts[i], self.counts[i], self.infldatas[i]
 
     def offsets(self, value):
@@ -146,6 +148,7 @@ class dictSupport(object):
                 if self.hasTag(inflectionTagTable, 0x07):
                     print("Error: Dictionary uses obsolete inflection rule scheme which is not yet supported")
                     decodeInflection = False
+                inflectionTagPlan = compileTagTable(inflectionTagTable)
 
             data = sect.loadSection(metaOrthIndex)
 
@@ -154,6 +157,7 @@ class dictSupport(object):
 
             tagSectionStart = idxhdr['len']
             controlByteCount, tagTable = readTagSection(tagSectionStart, data)
+            tagPlan = compileTagTable(tagTable)
             orthIndexCount = idxhdr['count']
             print("orthIndexCount is", orthIndexCount)
             if DEBUG_DICT:
@@ -170,10 +174,7 @@ class dictSupport(object):
                 hdrinfo, ordt1, ordt2 = self.parseHeader(data)
                 idxtPos = hdrinfo['start']
                 entryCount = hdrinfo['count']
-                idxPositions = []
-                for j in range(entryCount):
-                    pos, = struct.unpack_from(b'>H', data, idxtPos + 4 + (2 * j))
-                    idxPositions.append(pos)
+                idxPositions = list(struct.unpack_from(bstr('>%dH' % entryCount), data, idxtPos + 4))
                 # The last entry ends before the IDXT tag (but there might be zero fill bytes we need to ignore!)
                 idxPositions.append(idxtPos)
                 for j in range(entryCount):
@@ -199,10 +200,10 @@ class dictSupport(object):
                             pos += inc
                         text = utext.encode('utf-8')
 
-                    tagMap = getTagMap(controlByteCount, tagTable, data, startPos+1+textLength, endPos)
+                    tagMap = decodeTagMap(controlByteCount, tagPlan, data, startPos+1+textLength, endPos)
                     if 0x01 in tagMap:
                         if decodeInflection and 0x2a in tagMap:
-                            inflectionGroups = self.getInflectionGroups(text, inflectionControlByteCount, inflectionTagTable,
+                            inflectionGroups = self.getInflectionGroups(text, inflectionControlByteCount, inflectionTagPlan,
                                                                         dinfl, inflNameData, tagMap[0x2a])
                         else:
                             inflectionGroups = b''
@@ -243,35 +244,35 @@ class dictSupport(object):
                 return True
         return False
 
-    def getInflectionGroups(self, mainEntry, controlByteCount, tagTable, dinfl, inflectionNames, groupList):
+    def getInflectionGroups(self, mainEntry, controlByteCount, tagPlan, dinfl, inflectionNames, groupList):
         '''
         Create string which contains the inflection groups with inflection rules as mobipocket tags.
 
         @param mainEntry: The word to inflect.
         @param controlByteCount: The number of control bytes.
-        @param tagTable: The tag table.
+        @param tagPlan: The tag table compiled by compileTagTable.
         @param data: The Inflection data object to properly select the right inflection data section to use
         @param inflectionNames: The inflection rule name data.
         @param groupList: The list of inflection groups to process.
         @return: String with inflection groups and rules or empty string if required tags are not available.
         '''
-        result = b""
+        result = []
         for value in groupList:
             offset, nextOffset, data = dinfl.offsets(value)
 
             # First byte seems to be always 0x00 and must be skipped.
             assert ord(data[offset:offset+1]) == 0x00
-            tagMap = getTagMap(controlByteCount, tagTable, data, offset + 1, nextOffset)
+            tagMap = decodeTagMap(controlByteCount, tagPlan, data, offset + 1, nextOffset)
 
             # Make sure that the required tags are available.
             if 0x05 not in tagMap:
                 print("Error: Required tag 0x05 not found in tagMap")
-                return ""
+                return b''
             if 0x1a not in tagMap:
                 print("Error: Required tag 0x1a not found in tagMap")
                 return b''
 
-            result += b'<idx:infl>'
+            result.append(b'<idx:infl>')
 
             for i in range(len(tagMap[0x05])):
 
@@ -287,10 +288,10 @@ class dictSupport(object):
                 textLength = ord(data[offset:offset+1])
                 inflection = self.applyInflectionRule(mainEntry, data, offset+1, offset+1+textLength)
                 if inflection is not None:
-                    result += b'  <idx:iform name="' + inflectionName + b'" value="' + inflection + b'"/>'
+                    result.append(b'  <idx:iform name="' + inflectionName + b'" value="' + inflection + b'"/>')
 
-            result += b'</idx:infl>'
-        return result
+            result.append(b'</idx:infl>')
+        return b''.join(result)
 
     def applyInflectionRule(self, mainEntry, inflectionRuleData, start, end):
         '''
@@ -303,11 +304,9 @@ class dictSupport(object):
         @return: The string with the inflected word or None if an error occurs.
         '''
         mode = -1
-        byteArray = array.array(array_format, mainEntry)
+        byteArray = bytearray(mainEntry)
         position = len(byteArray)
-        for charOffset in range(start, end):
-            char = inflectionRuleData[charOffset:charOffset+1]
-            abyte = ord(char)
+        for abyte in bytearray(inflectionRuleData[start:end]):
             if abyte >= 0x0a and abyte <= 0x13:
                 # Move cursor backwards
                 offset = abyte - 0x0a
@@ -334,17 +333,17 @@ class dictSupport(object):
                         # Delete at word end
                         position -= 1
                         deleted = byteArray.pop(position)
-                        if bchr(deleted) != char:
+                        if deleted != abyte:
                             if DEBUG_DICT:
-                                print("0x03: %s %s %s %s" % (mainEntry, toHex(inflectionRuleData[start:end]), char, bchr(deleted)))
+                                print("0x03: %s %s %s %s" % (mainEntry, toHex(inflectionRuleData[start:end]), bchr(abyte), bchr(deleted)))
                             print("Error: Delete operation of inflection rule failed")
                             return None
                     elif mode == 0x04:
                         # Delete at word start
                         deleted = byteArray.pop(position)
-                        if bchr(deleted) != char:
+                        if deleted != abyte:
                             if DEBUG_DICT:
-                                print("0x03: %s %s %s %s" % (mainEntry, toHex(inflectionRuleData[start:end]), char, bchr(deleted)))
+                                print("0x03: %s %s %s %s" % (mainEntry, toHex(inflectionRuleData[start:end]), bchr(abyte), bchr(deleted)))
                             print("Error: Delete operation of inflection rule failed")
                             return None
                     else:
@@ -374,4 +373,4 @@ class dictSupport(object):
             else:
                 print("Error: Inflection rule mode %x is not implemented" % abyte)
                 return None
-        return utf8_str(byteArray.tostring())
+        return utf8_str(bytes(byteArray))
@@ -13,6 +13,7 @@ else:
     dict_ = dict
 
 from .compatibility_utils import PY2, unicode_str, hexlify, bord
+from .compatibility_utils import logprint as print
 
 if PY2:
     range = xrange
@@ -435,9 +436,10 @@ class MobiHeader:
 
     }
 
-    def __init__(self, sect, sectNumber):
+    def __init__(self, sect, sectNumber, headerOnly=False):
         self.sect = sect
         self.start = sectNumber
+        self.headerOnly = headerOnly
         self.header = self.sect.loadSection(self.start)
         if len(self.header)>20 and self.header[16:20] == b'MOBI':
             self.sect.setsectiondescription(0,"Mobipocket Header")
@@ -472,13 +474,16 @@ class MobiHeader:
         self.fragidx = 0xffffffff
         self.guideidx = 0xffffffff
         self.fdst = 0xffffffff
-        self.mlstart = self.sect.loadSection(self.start+1)[:4]
+        self.mlstart = self.sect.loadSectionStart(self.start+1, 4)
         self.rawSize = 0
         self.metadata = dict_()
 
         # set up for decompression/unpacking
         self.compression, = struct.unpack_from(b'>H', self.header, 0x0)
-        if self.compression == 0x4448:
+        if self.headerOnly:
+            # only the header and metadata are wanted, so skip loading the decompression tables
+            self.unpack = None
+        elif self.compression == 0x4448:
             reader = HuffcdicReader()
             huffoff, huffnum = struct.unpack_from(b'>LL', self.header, 0x70)
             huffoff = huffoff + self.start
@@ -848,6 +853,9 @@ class MobiHeader:
         self.metadata['Title'] = [unicode_str(self.title,self.codec)]
         self.metadata['Codec'] = [self.codec]
         self.metadata['UniqueID'] = [unicode_str(str(self.unique_id))]
+        # when only reporting what is in the header, don't fill in missing values
+        if self.headerOnly:
+            return
         # if no asin create one using a uuid
         if 'ASIN' not in self.metadata:
             self.metadata['ASIN'] = [unicode_str(str(uuid.uuid4()))]
@@ -5,6 +5,7 @@
 from __future__ import unicode_literals, division, absolute_import, print_function
 
 from .compatibility_utils import PY2, bchr, bstr, bord
+from .compatibility_utils import logprint as print
 if PY2:
     range = xrange
 
@@ -35,12 +36,12 @@ class MobiIndex:
             for j in range(idxhdr['nctoc']):
                 cdata = sect.loadSection(off + j)
                 sect.setsectiondescription(off+j, label + ' CTOC Data ' + str(j))
-                ctocdict = self.readCTOC(cdata)
-                for k in ctocdict:
-                    ctoc_text[k + rec_off] = ctocdict[k]
+                self.readCTOC(cdata, ctoc_text, rec_off)
                 rec_off += 0x10000
             tagSectionStart = idxhdr['len']
             controlByteCount, tagTable = readTagSection(tagSectionStart, data)
+            # the tag table is the same for every entry, so work out how to decode it once
+            tagPlan = compileTagTable(tagTable)
             if self.DEBUG:
                 print("ControlByteCount is", controlByteCount)
                 print("IndexCount is", IndexCount)
@@ -53,11 +54,8 @@ class MobiIndex:
                 entryCount = hdrinfo['count']
                 if self.DEBUG:
                     print(idxtPos, entryCount)
-                # loop through to build up the IDXT position starts
-                idxPositions = []
-                for j in range(entryCount):
-                    pos, = struct.unpack_from(b'>H', data, idxtPos + 4 + (2 * j))
-                    idxPositions.append(pos)
+                # build up the IDXT position starts
+                idxPositions = list(struct.unpack_from(bstr('>%dH' % entryCount), data, idxtPos + 4))
                 # The last entry ends before the IDXT tag (but there might be zero fill bytes we need to ignore!)
                 idxPositions.append(idxtPos)
                 # for each entry in the IDXT build up the tagMap and any associated text
@@ -68,7 +66,7 @@ class MobiIndex:
                     text = data[startPos+1:startPos+1+textLength]
                     if hordt2 is not None:
                         text = b''.join(bchr(hordt2[bord(x)]) for x in text)
-                    tagMap = getTagMap(controlByteCount, tagTable, data, startPos+1+textLength, endPos)
+                    tagMap = decodeTagMap(controlByteCount, tagPlan, data, startPos+1+textLength, endPos)
                     outtbl.append([text, tagMap])
                     if self.DEBUG:
                         print(tagMap)
@@ -115,9 +113,10 @@ class MobiIndex:
             print("")
         return header, ordt1, ordt2
 
-    def readCTOC(self, txtdata):
-        # read all blocks from CTOC
-        ctoc_data = {}
+    def readCTOC(self, txtdata, ctoc_data=None, rec_off=0):
+        # read all blocks from CTOC into ctoc_data, keyed by offset + rec_off
+        if ctoc_data is None:
+            ctoc_data = {}
         offset = 0
         while offset<len(txtdata):
             if PY2:
@@ -136,7 +135,7 @@ class MobiIndex:
             if self.DEBUG:
                 print("name length is ", ilen)
                 print(idx_offs, name)
-            ctoc_data[idx_offs] = name
+            ctoc_data[idx_offs + rec_off] = name
         return ctoc_data
 
 
@@ -150,14 +149,12 @@ def getVariableWidthValue(data, offset):
     '''
     value = 0
     consumed = 0
-    finished = False
-    while not finished:
-        v = data[offset + consumed: offset + consumed + 1]
+    while True:
+        v = bord(data[offset + consumed])
         consumed += 1
-        if ord(v) & 0x80:
-            finished = True
-        value = (value << 7) | (ord(v) & 0x7f)
-    return consumed, value
+        value = (value << 7) | (v & 0x7f)
+        if v & 0x80:
+            return consumed, value
 
 
 def readTagSection(start, data):
@@ -197,6 +194,34 @@ def countSetBits(value, bits=8):
     return count
 
 
+# decoding plans keyed by tag table, shared by all indexes using the same table
+_tagPlans = {}
+
+
+def compileTagTable(tagTable):
+    '''
+    Compile a tag table into a plan for decodeTagMap.
+
+    @param tagTable: The tag table as returned by readTagSection.
+    @return: List of (tag, values per entry, control byte index, mask, shift, multi bit mask) tuples.
+    '''
+    key = tuple(tagTable)
+    plan = _tagPlans.get(key)
+    if plan is None:
+        plan = []
+        controlByteIndex = 0
+        for tag, valuesPerEntry, mask, endFlag in tagTable:
+            if endFlag == 0x01:
+                controlByteIndex += 1
+                continue
+            shift = 0
+            while mask and (mask >> shift) & 0x01 == 0:
+                shift += 1
+            plan.append((tag, valuesPerEntry, controlByteIndex, mask, shift, countSetBits(mask) > 1))
+        _tagPlans[key] = plan
+    return plan
+
+
 def getTagMap(controlByteCount, tagTable, entryData, startPos, endPos):
     '''
     Create a map of tags and values from the given byte section.
@@ -208,23 +233,29 @@ def getTagMap(controlByteCount, tagTable, entryData, startPos, endPos):
     @param endPos: The end position in entryData or None if it is unknown.
     @return: Hashmap of tag and list of values.
     '''
+    return decodeTagMap(controlByteCount, compileTagTable(tagTable), entryData, startPos, endPos)
+
+
+def decodeTagMap(controlByteCount, tagPlan, entryData, startPos, endPos):
+    '''
+    Create a map of tags and values from the given byte section.
+
+    @param controlByteCount: The number of control bytes.
+    @param tagPlan: The tag table compiled by compileTagTable.
+    @param entryData: The data to process.
+    @param startPos: The starting position in entryData.
+    @param endPos: The end position in entryData or None if it is unknown.
+    @return: Hashmap of tag and list of values.
+    '''
     tags = []
     tagHashMap = {}
-    controlByteIndex = 0
     dataStart = startPos + controlByteCount
 
-    for tag, valuesPerEntry, mask, endFlag in tagTable:
-        if endFlag == 0x01:
-            controlByteIndex += 1
-            continue
-        cbyte = ord(entryData[startPos + controlByteIndex:startPos + controlByteIndex+1])
-        if 0:
-            print("Control Byte Index %0x , Control Byte Value %0x" % (controlByteIndex, cbyte))
-
-        value = ord(entryData[startPos + controlByteIndex:startPos + controlByteIndex+1]) & mask
+    for tag, valuesPerEntry, controlByteIndex, mask, shift, multiBit in tagPlan:
+        value = bord(entryData[startPos + controlByteIndex]) & mask
         if value != 0:
             if value == mask:
-                if countSetBits(mask) > 1:
+                if multiBit:
                     # If all bits of masked value are set and the mask has more than one bit, a variable width value
                     # will follow after the control bytes which defines the length of bytes (NOT the value count!)
                     # which will contain the corresponding variable width values.
@@ -235,19 +266,15 @@ def getTagMap(controlByteCount, tagTable, entryData, startPos, endPos):
                     tags.append((tag, 1, None, valuesPerEntry))
             else:
                 # Shift bits to get the masked value.
-                while mask & 0x01 == 0:
-                    mask = mask >> 1
-                    value = value >> 1
-                tags.append((tag, value, None, valuesPerEntry))
+                tags.append((tag, value >> shift, None, valuesPerEntry))
     for tag, valueCount, valueBytes, valuesPerEntry in tags:
         values = []
         if valueCount is not None:
             # Read valueCount * valuesPerEntry variable width values.
-            for _ in range(valueCount):
-                for _ in range(valuesPerEntry):
-                    consumed, data = getVariableWidthValue(entryData, dataStart)
-                    dataStart += consumed
-                    values.append(data)
+            for _ in range(valueCount * valuesPerEntry):
+                consumed, data = getVariableWidthValue(entryData, dataStart)
+                dataStart += consumed
+                values.append(data)
         else:
             # Convert valueBytes to variable width values.
             totalConsumed = 0
@@ -263,14 +290,7 @@ def getTagMap(controlByteCount, tagTable, entryData, startPos, endPos):
     # Test that all bytes have been processed if endPos is given.
     if endPos is not None and dataStart != endPos:
         # The last entry might have some zero padding bytes, so complain only if non zero bytes are left.
-        for char in entryData[dataStart:endPos]:
-            if bord(char) != 0:
-                print("Warning: There are unprocessed index bytes left: %s" % toHex(entryData[dataStart:endPos]))
-                if 0:
-                    print("controlByteCount: %s" % controlByteCount)
-                    print("tagTable: %s" % tagTable)
-                    print("data: %s" % toHex(entryData[startPos:endPos]))
-                    print("tagHashMap: %s" % tagHashMap)
-                break
+        if entryData[dataStart:endPos].strip(b'\0'):
+            print("Warning: There are unprocessed index bytes left: %s" % toHex(entryData[dataStart:endPos]))
 
     return tagHashMap
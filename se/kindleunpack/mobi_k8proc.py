@@ -5,6 +5,7 @@
 from __future__ import unicode_literals, division, absolute_import, print_function
 
 from .compatibility_utils import PY2, bstr, utf8_str
+from .compatibility_utils import logprint as print
 
 if PY2:
     range = xrange
@@ -16,6 +17,7 @@ import struct
 # data all the way up to at least python 2.7.5, python 3 okay with bytestring
 
 import re
+from collections import deque
 # note: re requites the pattern to be the exact same type as the data to be searched in python3
 # but u"" is not allowed for the pattern itself only b""
 
@@ -52,6 +54,56 @@ def reverse_tag_iter(block):
         end = plt
 
 
+# The helpers below let buildParts assemble a part without re-copying the whole
+# skeleton for every fragment.  The assembled text is kept as two lists of
+# (data, start, end) segments: "done" holds everything before the current insert
+# position (it can no longer change while insert positions are ascending) and
+# "pending" holds everything after it.  Bytes are only copied once, when the
+# part is finally joined.
+
+def join_segments(*segment_lists):
+    return b''.join([data[start:end] for segments in segment_lists for (data, start, end) in segments])
+
+
+# move count bytes from the front of pending onto the end of done
+def advance_segments(done, pending, count):
+    moved = 0
+    while count > 0 and pending:
+        data, start, end = pending.popleft()
+        size = end - start
+        if size > count:
+            done.append((data, start, start + count))
+            pending.appendleft((data, start + count, end))
+            size = count
+        else:
+            done.append((data, start, end))
+        moved += size
+        count -= size
+    return moved
+
+
+# equivalent of tail.find(ch) where tail is the text held in pending
+def find_in_segments(pending, ch):
+    offset = 0
+    for data, start, end in pending:
+        pos = data.find(ch, start, end)
+        if pos != -1:
+            return offset + pos - start
+        offset += end - start
+    return -1
+
+
+# equivalent of head.rfind(ch) where head is the donelen bytes held in done
+def rfind_in_segments(done, donelen, ch):
+    offset = donelen
+    for data, start, end in reversed(done):
+        offset -= end - start
+        pos = data.rfind(ch, start, end)
+        if pos != -1:
+            return offset + pos - start
+    return -1
+
+
 class K8Processor:
 
     def __init__(self, mh, sect, files, debug=False):
@@ -180,35 +232,52 @@ class K8Processor:
         fragptr = 0
         baseptr = 0
         cnt = 0
+        textlen = len(text)
         for [skelnum, skelname, fragcnt, skelpos, skellen] in self.skeltbl:
             baseptr = skelpos + skellen
-            skeleton = text[skelpos: baseptr]
+            # fragments are normally listed in ascending insert position order, so the
+            # text before each insert position is final once we have passed it
+            done = []
+            donelen = 0
+            pending = deque([(text, min(skelpos, textlen), min(baseptr, textlen))])
             for i in range(fragcnt):
                 [insertpos, idtext, filenum, seqnum, startpos, length] = self.fragtbl[fragptr]
                 aidtext = idtext[12:-2]
                 if i == 0:
                     filename = 'part%04d.xhtml' % filenum
-                slice = text[baseptr: baseptr + length]
                 insertpos = insertpos - skelpos
-                head = skeleton[:insertpos]
-                tail = skeleton[insertpos:]
+                splicepos = insertpos
+                if splicepos < 0:
+                    # a corrupt fragment table can put the insert position before the start of the
+                    # skeleton; the old skeleton[:insertpos] splice counted that back from the end
+                    # of the part, so do the same here to keep the output unchanged
+                    splicepos = max(0, donelen + sum([end - start for (_, start, end) in pending]) + splicepos)
+                if splicepos < donelen:
+                    # out of order fragment, so restart from the fully assembled skeleton
+                    skeleton = join_segments(done, pending)
+                    done, donelen, pending = [], 0, deque([(skeleton, 0, len(skeleton))])
+                donelen += advance_segments(done, pending, splicepos - donelen)
                 actual_inspos = insertpos
-                if (tail.find(b'>') < tail.find(b'<') or head.rfind(b'>') < head.rfind(b'<')):
+                if (find_in_segments(pending, b'>') < find_in_segments(pending, b'<') or
+                        rfind_in_segments(done, donelen, b'>') < rfind_in_segments(done, donelen, b'<')):
                     # There is an incomplete tag in either the head or tail.
                     # This can happen for some badly formed KF8 files
                     print('The fragment table for %s has incorrect insert position. Calculating manually.' % skelname)
+                    skeleton = join_segments(done, pending)
                     bp, ep = locate_beg_end_of_tag(skeleton, aidtext)
                     if bp != ep:
                         actual_inspos = ep + 1 + startpos
-                if insertpos != actual_inspos:
-                    print("fixed corrupt fragment table insert position", insertpos+skelpos, actual_inspos+skelpos)
-                    insertpos = actual_inspos
-                    self.fragtbl[fragptr][0] = actual_inspos + skelpos
-                skeleton = skeleton[0:insertpos] + slice + skeleton[insertpos:]
+                    if insertpos != actual_inspos:
+                        print("fixed corrupt fragment table insert position", insertpos+skelpos, actual_inspos+skelpos)
+                        insertpos = actual_inspos
+                        self.fragtbl[fragptr][0] = actual_inspos + skelpos
+                        done, donelen, pending = [], 0, deque([(skeleton, 0, len(skeleton))])
+                        donelen += advance_segments(done, pending, insertpos)
+                pending.appendleft((text, min(baseptr, textlen), min(baseptr + length, textlen)))
                 baseptr = baseptr + length
                 fragptr += 1
             cnt += 1
-            self.parts.append(skeleton)
+            self.parts.append(join_segments(done, pending))
             self.partinfo.append([skelnum, 'Text', filename, skelpos, baseptr, aidtext])
 
         assembled_text = b''.join(self.parts)
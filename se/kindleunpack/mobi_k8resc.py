@@ -13,6 +13,7 @@ else:
     dict_ = dict
 
 from .compatibility_utils import unicode_str
+from .compatibility_utils import logprint as print
 
 from .mobi_utils import fromBase32
 
@@ -5,6 +5,7 @@
 from __future__ import unicode_literals, division, absolute_import, print_function
 
 from .compatibility_utils import unicode_str
+from .compatibility_utils import logprint as print
 import os
 from .unipath import pathof
 
@@ -5,6 +5,7 @@
 from __future__ import unicode_literals, division, absolute_import, print_function
 
 import os
+from .compatibility_utils import logprint as print
 from .unipath import pathof
 
 
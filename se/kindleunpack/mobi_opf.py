@@ -6,6 +6,7 @@ from __future__ import unicode_literals, division, absolute_import, print_functi
 
 from .compatibility_utils import unicode_str, unescapeit
 from .compatibility_utils import lzip
+from .compatibility_utils import logprint as print
 
 from .unipath import pathof
 
@@ -5,8 +5,10 @@
 from __future__ import unicode_literals, division, absolute_import, print_function
 
 from .compatibility_utils import PY2, hexlify, bstr, bord, bchar
+from .compatibility_utils import logprint as print
 
 import datetime
+import os
 
 if PY2:
     range = xrange
@@ -118,3 +120,40 @@ class Sectionizer:
     def loadSection(self, section):
         before, after = self.sectionoffsets[section:section+2]
         return self.data[before:after]
+
+    def loadSectionStart(self, section, length):
+        before, after = self.sectionoffsets[section:section+2]
+        return self.data[before:min(after, before+length)]
+
+
+class HeaderSectionizer(Sectionizer):
+    # reads only the palm header and section table up front and then loads
+    # sections from the file on demand, for when only the headers are wanted
+
+    def __init__(self, filename):
+        self.data = None
+        self.file = open(pathof(filename), 'rb')
+        self.palmheader = self.file.read(78)
+        self.palmname = self.palmheader[:32]
+        self.ident = self.palmheader[0x3C:0x3C+8]
+        self.num_sections, = struct.unpack_from(b'>H', self.palmheader, 76)
+        self.filelength = os.fstat(self.file.fileno()).st_size
+        sectionsdata = struct.unpack(bstr('>%dL' % (self.num_sections*2)), self.file.read(self.num_sections*8)) + (self.filelength, 0)
+        self.sectionoffsets = sectionsdata[::2]
+        self.sectionattributes = sectionsdata[1::2]
+        self.sectiondescriptions = ["" for x in range(self.num_sections+1)]
+        self.sectiondescriptions[-1] = "File Length Only"
+        return
+
+    def loadSection(self, section):
+        before, after = self.sectionoffsets[section:section+2]
+        self.file.seek(before)
+        return self.file.read(after-before)
+
+    def loadSectionStart(self, section, length):
+        before, after = self.sectionoffsets[section:section+2]
+        self.file.seek(before)
+        return self.file.read(min(after-before, length))
+
+    def close(self):
+        self.file.close()
@@ -8,6 +8,7 @@ import struct
 # note:  struct pack, unpack, unpack_from all require bytestring format
 # data all the way up to at least python 2.7.5, python 3 okay with bytestring
 
+from .compatibility_utils import logprint as print
 from .unipath import pathof
 
 
@@ -11,6 +11,8 @@ from __future__ import unicode_literals, division, absolute_import, print_functi
 
 import sys
 import os
+import shutil
+import tempfile
 import getopt
 import struct
 import locale
@@ -150,6 +152,70 @@ def del_exth(rec0,exth_num):
 		ebase_idx = ebase_idx+exth_size
 	return rec0
 
+def set_asin_exth(rec0,asin):
+	# in the first mobi header
+	# add 501 to "EBOK", add 113 as asin, add 504 as asin
+	# this is the same as del_exth(501, 113, 504) followed by add_exth(113, 504, 501),
+	# but rebuilds the record once instead of once per step
+	ebase,elen,enum,rlen = get_exth_params(rec0)
+	todelete = set([501,113,504])
+	kept = []
+	removedsize = 0
+	removednum = 0
+	ebase_idx = ebase+12
+	for _ in range(enum):
+		exth_id = getint(rec0,ebase_idx)
+		exth_size = getint(rec0,ebase_idx+4)
+		if exth_id in todelete:
+			todelete.discard(exth_id)
+			removedsize += exth_size
+			removednum += 1
+		else:
+			kept.append(rec0[ebase_idx:ebase_idx+exth_size])
+		ebase_idx = ebase_idx+exth_size
+	added = []
+	for exth_num,exth_bytes in ((501,b'EBOK'),(504,asin),(113,asin)):
+		added.append(struct.pack(b'>LL',exth_num,8+len(exth_bytes))+exth_bytes)
+	addedsize = sum(len(rec) for rec in added)
+	newrec0 = bytearray(rec0[0:ebase+4])
+	newrec0 += struct.pack(b'>LL',elen-removedsize+addedsize,enum-removednum+len(added))
+	for rec in added+kept:
+		newrec0 += rec
+	newrec0 += rec0[ebase_idx:]
+	# keep constant record length by trimming or padding null bytes at the end
+	newrec0 += b'\0'*removedsize
+	if newrec0[rlen:] != b'\0'*(len(newrec0)-rlen):
+		raise DualMetaFixException('add_exth: trimmed non-null bytes at end of section')
+	del newrec0[rlen:]
+	struct.pack_into(b'>L',newrec0,title_offset,getint(rec0,title_offset)-removedsize+addedsize)
+	return bytes(newrec0)
+
+def getrec0addr(infile):
+	# read only the palm database header to find record 0
+	header = infile.read(first_pdb_record)
+	if len(header) < first_pdb_record:
+		raise DualMetaFixException('file too short to be a mobi')
+	nsec = getint(header,number_of_pdb_records,b'H')
+	if nsec == 0:
+		raise DualMetaFixException('requested section number 0 out of range (nsec=0)')
+	secstart = getint(infile.read(4),0)
+	if nsec == 1:
+		secend = os.fstat(infile.fileno()).st_size
+	else:
+		infile.seek(first_pdb_record+8)
+		secend = getint(infile.read(4),0)
+	return secstart,secend
+
+def patch_asin(asin, path):
+	# rewrite record 0 in place, the rest of the file is left untouched
+	with open(pathof(path), 'r+b') as f:
+		secstart,secend = getrec0addr(f)
+		f.seek(secstart)
+		rec0 = f.read(secend-secstart)
+		newrec0 = set_asin_exth(rec0, asin.encode('utf-8'))
+		f.seek(secstart)
+		f.write(newrec0)
+
 class DualMobiMetaFix:
 
 	def __init__(self, infile, asin):
@@ -157,15 +223,7 @@ class DualMobiMetaFix:
 		self.datain_rec0 = readsection(self.datain,0)
 		self.asin = asin.encode('utf-8')
 
-		# in the first mobi header
-		# add 501 to "EBOK", add 113 as asin, add 504 as asin
-		rec0 = self.datain_rec0
-		rec0 = del_exth(rec0, 501)
-		rec0 = del_exth(rec0, 113)
-		rec0 = del_exth(rec0, 504)
-		rec0 = add_exth(rec0, 113, self.asin)
-		rec0 = add_exth(rec0, 504, self.asin)
-		rec0 = add_exth(rec0, 501, b'EBOK')
+		rec0 = set_asin_exth(self.datain_rec0, self.asin)
 		self.datain = replacesection(self.datain, 0, rec0)
 
 		ver = getint(self.datain_rec0,mobi_version)
@@ -173,6 +231,29 @@ class DualMobiMetaFix:
 	def getresult(self):
 		return self.datain
 
-def update_asin(asin, infile, outfile):
-	dmf = DualMobiMetaFix(infile, asin)
-	open(pathof(outfile),'wb').write(dmf.getresult())
+def update_asin(asin, infile, outfile=None):
+	# record 0 keeps a constant length, so instead of rebuilding the whole file in memory
+	# copy it (shutil uses sendfile where it can) and patch record 0 in place.
+	# if outfile is None, infile is patched in place; patch_asin() only writes once the new record 0 is built.
+	if outfile is None or os.path.abspath(pathof(outfile)) == os.path.abspath(pathof(infile)):
+		patch_asin(asin, infile)
+		return
+
+	# patch a temporary copy next to outfile, and only move it into place if patching succeeds,
+	# so that a failure doesn't leave an unpatched book at outfile
+	fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(pathof(outfile))), suffix='.tmp')
+	os.close(fd)
+	try:
+		shutil.copyfile(pathof(infile), temp_path)
+		# mkstemp() creates the file readable only by us; give the output the input's permissions instead
+		shutil.copymode(pathof(infile), temp_path)
+		patch_asin(asin, temp_path)
+		os.replace(temp_path, pathof(outfile))
+	except BaseException:
+		os.remove(temp_path)
+		raise
+
+def update_asins(books):
+	# batch version of update_asin; books is an iterable of (asin, infile, outfile) tuples
+	for asin, infile, outfile in books:
+		update_asin(asin, infile, outfile)
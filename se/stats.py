@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Word count, reading ease, and other text statistics for Standard Ebooks source directories.
+
+Each file is read once, and all of the statistics are collected from that one read, so that
+tools that need more than one of them (like prepare-release) don't have to walk and read the
+whole book again for each one.
+"""
+
+import os
+import fnmatch
+import string
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+import regex
+import lxml.html
+import se
+
+
+INCLUDED_CHARACTERS = list(string.whitespace) + list(string.digits) + [":", ";", ".", "?", "!"]
+
+# Word lists and patterns for get_syllable_count(); see http://eayd.in/?p=232
+SYLLABLE_EXCEPTIONS_ADD = frozenset(["serious", "crucial"])
+SYLLABLE_EXCEPTIONS_DEL = frozenset(["fortunately", "unfortunately"])
+SYLLABLE_CO_ONE = frozenset(["cool", "coach", "coat", "coal", "count", "coin", "coarse", "coup", "coif", "cook", "coign", "coiffe", "coof", "court"])
+SYLLABLE_CO_TWO = frozenset(["coapt", "coed", "coinci"])
+SYLLABLE_PRE_ONE = frozenset(["preach"])
+SYLLABLE_LE_EXCEPTIONS = frozenset(["whole", "mobile", "pole", "male", "female", "hale", "pale", "tale", "sale", "aisle", "whale", "while"])
+SYLLABLE_NEGATIVES = frozenset(["doesn't", "isn't", "shouldn't", "couldn't", "wouldn't"])
+_WORD_COUNT_SEPARATORS = str.maketrans(dict.fromkeys("…–—― ‘’“”{}()", " "))
+_WORD_REGEX = regex.compile(r"\w+")
+_WORD_JOIN_REGEX = regex.compile(r"[a-z0-9][\-\'\,\.\/][a-z0-9]", flags=regex.IGNORECASE)
+_WORD_COUNT_TOKEN_REGEX = regex.compile(r"\w+|[\.\?!]")
+_HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+_PENDING_TEXT_LIMIT = 16384 # In characters; how much text to collect before counting it
+_SENTENCE_END_REGEX = regex.compile(r" *[\.\?!]['\"\)\]]* *")
+_VOWEL_REGEX = regex.compile(r"[eaoui]")
+_VOWEL_PAIR_REGEX = regex.compile(r"[eaoui][eaoui]")
+_VOWEL_TRIPLE_REGEX = regex.compile(r"[eaoui][eaoui][eaoui]")
+_VOWEL_CONSONANT_REGEX = regex.compile(r"[eaoui][^eaoui]")
+
+
+def _get_word_count_text(xhtml: str) -> str:
+	"""
+	Get the text of a string of XHTML that words are counted in.
+	"""
+
+	# Remove HTML tags
+	text = regex.sub(r"<title>.+?</title>", " ", xhtml)
+	text = regex.sub(r"<.+?>", "", text, flags=regex.DOTALL)
+
+	# Replace some formatting characters
+	return text.translate(_WORD_COUNT_SEPARATORS)
+
+def _count_words(text: str) -> int:
+	"""
+	Count the words in text returned by _get_word_count_text().
+	"""
+
+	# Word-connecting dashes, apostrophes, commas, and slashes (and/or) count as a word boundary but they shouldn't,
+	# so each one that joins two words takes one off the count
+	return len(_WORD_REGEX.findall(text)) - len(_WORD_JOIN_REGEX.findall(text))
+
+def get_word_count(xhtml: str) -> int:
+	"""
+	Count the number of words in a string of XHTML, the way the se:word-count metadata counts them.
+
+	INPUTS
+	xhtml: A string of XHTML
+
+	OUTPUTS
+	The number of words in the XHTML
+	"""
+
+	return _count_words(_get_word_count_text(xhtml))
+
+def get_word_count_report(xhtml: str) -> dict:
+	"""
+	Get the word count of a string of XHTML along with its sentence count and vocabulary size, all from one pass over its words.
+
+	INPUTS
+	xhtml: A string of XHTML
+
+	OUTPUTS
+	A dict with the word count (as counted by get_word_count()), the sentence count (as counted by TextStatistics), and the number of distinct lowercased words
+	"""
+
+	text = _get_word_count_text(xhtml)
+
+	word_count = 0
+	vocabulary = set()
+	sentences = _SentenceCounter()
+	word_start = None
+	previous_start = -2
+	previous_end = -2
+	previous_joined = False
+
+	for token in _WORD_COUNT_TOKEN_REGEX.finditer(text):
+		start, end = token.span()
+
+		if text[start] in ".?!":
+			sentences.end_sentence()
+			continue
+
+		# A dash, apostrophe, comma, period, or slash between two words joins them into one, the same way _count_words() counts them.
+		# Its regex matches can't overlap, so a one-letter word that was joined to the word before it can't also be joined to the word after it.
+		joined = start - 1 == previous_end and not (previous_joined and previous_end - previous_start == 1) and _WORD_JOIN_REGEX.fullmatch(text, start - 2, start + 1) is not None
+
+		if not joined:
+			if word_start is not None:
+				vocabulary.add(text[word_start:previous_end].lower())
+
+			word_start = start
+			word_count += 1
+			sentences.add_words(1)
+
+		previous_start = start
+		previous_end = end
+		previous_joined = joined
+
+	if word_start is not None:
+		vocabulary.add(text[word_start:previous_end].lower())
+
+	return {"word_count": word_count, "sentence_count": sentences.total, "vocabulary": len(vocabulary)}
+
+@lru_cache(maxsize=65536)
+def get_syllable_count(word: str) -> int:
+	"""
+	Helper function to get the syllable count of a word.
+
+	Results are cached, since most of the words in a book are repeats.
+	"""
+
+	syls = 0 # Added syllable number
+	disc = 0 # Discarded syllable number
+
+	# 1) if letters < 3: return 1
+	if len(word) <= 3:
+		syls = 1
+		return syls
+
+	# 2) if doesn't end with "ted" or "tes" or "ses" or "ied" or "ies", discard "es" and "ed" at the end.
+	# if it has only 1 vowel or 1 set of consecutive vowels, discard. (like "speed", "fled" etc.)
+	if word[-2:] == "es" or word[-2:] == "ed":
+		double_and_triple_1 = len(_VOWEL_PAIR_REGEX.findall(word))
+		if double_and_triple_1 > 1 or len(_VOWEL_CONSONANT_REGEX.findall(word)) > 1:
+			if word[-3:] == "ted" or word[-3:] == "tes" or word[-3:] == "ses" or word[-3:] == "ied" or word[-3:] == "ies":
+				pass
+			else:
+				disc += 1
+
+	# 3) discard trailing "e", except where ending is "le"
+	if word[-1:] == "e":
+		if word[-2:] == "le" and word not in SYLLABLE_LE_EXCEPTIONS:
+			pass
+
+		else:
+			disc += 1
+
+	# 4) check if consecutive vowels exists, triplets or pairs, count them as one.
+	double_and_triple = len(_VOWEL_PAIR_REGEX.findall(word))
+	tripple = len(_VOWEL_TRIPLE_REGEX.findall(word))
+	disc += double_and_triple + tripple
+
+	# 5) count remaining vowels in word.
+	num_vowels = len(_VOWEL_REGEX.findall(word))
+
+	# 6) add one if starts with "mc"
+	if word[:2] == "mc":
+		syls += 1
+
+	# 7) add one if ends with "y" but is not surrouned by vowel
+	if word[-1:] == "y" and word[-2] not in "aeoui":
+		syls += 1
+
+	# 8) add one if "y" is surrounded by non-vowels and is not in the last word.
+	for i, j in enumerate(word):
+		if j == "y":
+			if (i != 0) and (i != len(word) - 1):
+				if word[i - 1] not in "aeoui" and word[i + 1] not in "aeoui":
+					syls += 1
+
+	# 9) if starts with "tri-" or "bi-" and is followed by a vowel, add one.
+	if word[:3] == "tri" and word[3] in "aeoui":
+		syls += 1
+
+	if word[:2] == "bi" and word[2] in "aeoui":
+		syls += 1
+
+	# 10) if ends with "-ian", should be counted as two syllables, except for "-tian" and "-cian"
+	if word[-3:] == "ian":
+	# and (word[-4:] != "cian" or word[-4:] != "tian"):
+		if word[-4:] == "cian" or word[-4:] == "tian":
+			pass
+		else:
+			syls += 1
+
+	# 11) if starts with "co-" and is followed by a vowel, check if exists in the double syllable dictionary, if not, check if in single dictionary and act accordingly.
+	if word[:2] == "co" and word[2] in "eaoui":
+
+		if word[:4] in SYLLABLE_CO_TWO or word[:5] in SYLLABLE_CO_TWO or word[:6] in SYLLABLE_CO_TWO:
+			syls += 1
+		elif word[:4] in SYLLABLE_CO_ONE or word[:5] in SYLLABLE_CO_ONE or word[:6] in SYLLABLE_CO_ONE:
+			pass
+		else:
+			syls += 1
+
+	# 12) if starts with "pre-" and is followed by a vowel, check if exists in the double syllable dictionary, if not, check if in single dictionary and act accordingly.
+	if word[:3] == "pre" and word[3] in "eaoui":
+		if word[:6] in SYLLABLE_PRE_ONE:
+			pass
+		else:
+			syls += 1
+
+	# 13) check for "-n't" and cross match with dictionary to add syllable.
+	if word[-3:] == "n't":
+		if word in SYLLABLE_NEGATIVES:
+			syls += 1
+		else:
+			pass
+
+	# 14) Handling the exceptional words.
+	if word in SYLLABLE_EXCEPTIONS_DEL:
+		disc += 1
+
+	if word in SYLLABLE_EXCEPTIONS_ADD:
+		syls += 1
+
+	# Calculate the output
+	return num_vowels - disc + syls
+
+def get_total_syllable_count(word_counts: Counter) -> int:
+	"""
+	Get the total syllable count of a body of text, scoring each distinct word once.
+
+	INPUTS
+	word_counts: A Counter of how many times each word appears
+
+	OUTPUTS
+	The total number of syllables
+	"""
+
+	return sum(get_syllable_count(word) * count for word, count in word_counts.items())
+
+def get_flesch_reading_ease(word_count: int, sentence_count: int, syllable_count: int) -> float:
+	"""
+	Calculate the Flesch reading ease score.
+
+	INPUTS
+	word_count: The number of words
+	sentence_count: The number of sentences
+	syllable_count: The number of syllables
+
+	OUTPUTS
+	The Flesch reading ease score, rounded to two decimal places
+	"""
+
+	word_count = max(word_count, 1)
+	sentence_count = max(sentence_count, 1)
+
+	average_sentence_length = round(float(word_count) / float(sentence_count), 1)
+	average_syllables_per_word = round(float(syllable_count) / float(word_count), 1)
+
+	return round(206.835 - float(1.015 * average_sentence_length) - float(84.6 * average_syllables_per_word), 2)
+
+class _CharacterFilter(dict):
+	"""
+	A str.translate() table that removes the characters that a function rejects.
+	Each character is checked the first time it's seen, so translate() can then filter text without calling back into Python.
+	"""
+
+	def __init__(self, keep):
+		super().__init__()
+		self.keep = keep
+
+	def __missing__(self, codepoint: int):
+		self[codepoint] = codepoint if self.keep(chr(codepoint)) else None
+
+		return self[codepoint]
+
+_NON_SENTENCE_PUNCTUATION_FILTER = _CharacterFilter(lambda char: char.isalpha() or char in INCLUDED_CHARACTERS)
+_NONSPACING_MARK_FILTER = _CharacterFilter(lambda char: unicodedata.category(char) != "Mn")
+
+def _normalize_reading_ease_text(text: str) -> str:
+	"""
+	Lowercase text, remove accents, and remove any punctuation except sentence-ending punctuation.
+	"""
+
+	# Remove non-sentence-ending punctuation from source text
+	text = regex.sub(r"[—–\n]", " ", text.lower()).translate(_NON_SENTENCE_PUNCTUATION_FILTER)
+
+	# Remove accents
+	return unicodedata.normalize("NFD", text).translate(_NONSPACING_MARK_FILTER)
+
+class _SentenceCounter:
+	"""
+	Count sentences the way reading ease counts them: a sentence ends at every `.`, `?`, or `!`, and only counts if it has more than two words,
+	so that the pieces that abbreviations like "Mr." or "e.g." break off aren't counted as sentences of their own.
+	"""
+
+	def __init__(self):
+		self.count = 0
+		self._word_count = 0 # The number of words in the sentence that hasn't ended yet
+
+	def add_words(self, word_count: int) -> None:
+		"""
+		Add words to the sentence that hasn't ended yet.
+		"""
+
+		self._word_count += word_count
+
+	def end_sentence(self) -> int:
+		"""
+		End the current sentence, and return 1 if it counted as a sentence or 0 if it didn't.
+		"""
+
+		counted = 1 if self._word_count > 2 else 0
+		self.count += counted
+		self._word_count = 0
+
+		return counted
+
+	@property
+	def total(self) -> int:
+		"""
+		The number of sentences, including the last one, which may not have ended with punctuation.
+		"""
+
+		return self.count + (1 if self._word_count > 2 else 0)
+
+class TextStatistics:
+	"""
+	Statistics for a sequence of XHTML files, added one at a time with add_file().
+
+	word_count is the se:word-count metadata value, which excludes endnotes and the files in
+	se.IGNORED_FILENAMES. Reading ease is calculated from every file except the ones in
+	se.IGNORED_FILENAMES, and `files` has the statistics of each file.
+	"""
+
+	def __init__(self):
+		self.word_count = 0
+		self.reading_ease_word_count = 0
+		self.syllable_count = 0
+		self.files = []
+
+		# A file can end in the middle of a sentence that the next file finishes
+		self._sentences = _SentenceCounter()
+
+		# Text that has been read but not counted yet, which may end in the middle of a word
+		self._pending_text = ""
+
+	def _count_text(self, text: str, file_statistics: dict) -> None:
+		"""
+		Count the words, syllables, and finished sentences in a piece of normalized text that ends on a word boundary.
+		"""
+
+		words = text.split()
+
+		file_statistics["reading_ease_word_count"] += len(words)
+		file_statistics["syllable_count"] += get_total_syllable_count(Counter(words))
+
+		sentences = _SENTENCE_END_REGEX.split(text)
+		for sentence in sentences[:-1]:
+			self._sentences.add_words(len(sentence.split()))
+			file_statistics["sentence_count"] += self._sentences.end_sentence()
+
+		# The last sentence may continue in the next piece of text, so count it then
+		self._sentences.add_words(len(sentences[-1].split()))
+
+	def _add_text(self, text: str, file_statistics: dict) -> None:
+		"""
+		Add a piece of body text, counting it once enough has built up.
+		"""
+
+		self._pending_text += _normalize_reading_ease_text(text)
+
+		if len(self._pending_text) >= _PENDING_TEXT_LIMIT:
+			# Only count up to the last whitespace, so that we don't split a word that continues in the next piece of text
+			boundary = max(self._pending_text.rfind(char) for char in string.whitespace) + 1
+
+			if boundary > 0:
+				self._count_text(self._pending_text[:boundary], file_statistics)
+				self._pending_text = self._pending_text[boundary:]
+
+	def add_file(self, filename: str, xhtml: str) -> dict:
+		"""
+		Add a file's statistics to the totals.
+
+		INPUTS
+		filename: The path of the file
+		xhtml: The contents of the file
+
+		OUTPUTS
+		A dict of the statistics for just this file
+		"""
+
+		file_statistics = {"filename": filename, "word_count": get_word_count(xhtml), "reading_ease_word_count": 0, "sentence_count": 0, "syllable_count": 0}
+
+		if not filename.endswith(tuple(se.IGNORED_FILENAMES + ["endnotes.xhtml"])): # str.endswith() only accepts tuples, not lists
+			self.word_count += file_statistics["word_count"]
+
+		if os.path.basename(filename) not in se.IGNORED_FILENAMES:
+			# Go through the body text a bit at a time, instead of building strings of the whole file or book
+			body = lxml.html.fromstring(xhtml.encode("utf-8"), parser=_HTML_PARSER).find("body")
+
+			if body is not None:
+				for text in body.itertext():
+					self._add_text(text, file_statistics)
+
+			# A file always ends on a word boundary
+			self._count_text(self._pending_text + " ", file_statistics)
+			self._pending_text = ""
+
+			self.reading_ease_word_count += file_statistics["reading_ease_word_count"]
+			self.syllable_count += file_statistics["syllable_count"]
+
+		self.files.append(file_statistics)
+
+		return file_statistics
+
+	@property
+	def sentence_count(self) -> int:
+		"""
+		The number of sentences of more than two words, including the last one, which may not have ended with punctuation.
+		"""
+
+		return self._sentences.total
+
+	@property
+	def flesch_reading_ease(self) -> float:
+		"""
+		The Flesch reading ease score of the files added so far.
+		"""
+
+		return get_flesch_reading_ease(self.reading_ease_word_count, self.sentence_count, self.syllable_count)
+
+def get_statistics(directory: str) -> TextStatistics:
+	"""
+	Calculate the statistics of all of the XHTML files in a directory, reading each file once.
+
+	INPUTS
+	directory: A Standard Ebooks source directory
+
+	OUTPUTS
+	A TextStatistics object with the totals and the statistics of each file
+	"""
+
+	statistics = TextStatistics()
+
+	for root, _, filenames in os.walk(directory):
+		for filename in fnmatch.filter(filenames, "*.xhtml"):
+			with open(os.path.join(root, filename), "r", encoding="utf-8") as file:
+				statistics.add_file(os.path.join(root, filename), file.read())
+
+	return statistics
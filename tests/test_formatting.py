@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+
+import unittest
+import se.formatting
+
+def _get_xhtml(body: str) -> str:
+	return "<?xml version=\"1.0\" encoding=\"utf-8\"?>\n<html xmlns=\"http://www.w3.org/1999/xhtml\" xmlns:epub=\"http://www.idpf.org/2007/ops\"><head><title>Test</title></head><body>{}</body></html>\n".format(body)
+
+class TestSemanticate(unittest.TestCase):
+	def test_roman_numerals_are_wrapped(self):
+		self.assertEqual(se.formatting.semanticate(_get_xhtml("<p>Louis XIV was king.</p>")), _get_xhtml("<p>Louis <span epub:type=\"z3998:roman\">XIV</span> was king.</p>"))
+
+	def test_text_inside_abbr_is_left_alone(self):
+		# Neither pass may add elements inside an existing <abbr>, including inside its children
+		for body in ["<p>In the reign of <abbr>Geo. III</abbr> we lived.</p>", "<p>In the reign of <abbr class=\"name\"><i>Geo. III</i></abbr> we lived.</p>"]:
+			with self.subTest(body=body):
+				self.assertEqual(se.formatting.semanticate(_get_xhtml(body)), _get_xhtml(body))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+import random
+import unittest
+from se.kindleunpack.mobi_k8proc import K8Processor
+
+def _get_processor(raw_ml: bytes, skeleton_table: list, fragment_table: list) -> K8Processor:
+	"""
+	Get a K8Processor with just the tables that buildParts() reads, without parsing a MOBI file.
+	"""
+
+	processor = K8Processor.__new__(K8Processor)
+	processor.DEBUG = False
+	processor.files = None
+	processor.flowinfo = []
+	processor.fdsttbl = [0, len(raw_ml)]
+	processor.skeltbl = skeleton_table
+	processor.fragtbl = fragment_table
+
+	return processor
+
+def _splice_parts(text: bytes, skeleton_table: list, fragment_table: list) -> list:
+	"""
+	Assemble the parts the way buildParts() did before it kept parts as segments, by slicing the whole skeleton for every fragment.
+	"""
+
+	parts = []
+	fragment_index = 0
+	for _, _, fragment_count, skeleton_position, skeleton_length in skeleton_table:
+		base = skeleton_position + skeleton_length
+		skeleton = text[skeleton_position:base]
+		for _ in range(fragment_count):
+			insert_position, _, _, _, _, length = fragment_table[fragment_index]
+			insert_position -= skeleton_position
+			skeleton = skeleton[0:insert_position] + text[base:base + length] + skeleton[insert_position:]
+			base += length
+			fragment_index += 1
+		parts.append(skeleton)
+
+	return parts
+
+def _get_tables(rng: random.Random, text_length: int, min_insert_offset: int) -> tuple:
+	"""
+	Get random skeleton and fragment tables that cover a text of a given length.
+	Insert positions are relative to each skeleton's start, from min_insert_offset up to a little past the end of the part.
+	"""
+
+	skeleton_table = []
+	fragment_table = []
+	position = 0
+	skeleton_number = 0
+	while position < text_length:
+		skeleton_length = min(rng.randint(0, 20), text_length - position)
+		# Every skeleton has at least one fragment, as in real files
+		fragment_lengths = [rng.randint(0, 10) for _ in range(rng.randint(1, 5))]
+		skeleton_table.append([skeleton_number, "SKEL%010d" % skeleton_number, len(fragment_lengths), position, skeleton_length])
+
+		part_length = skeleton_length
+		for length in fragment_lengths:
+			insert_position = rng.randint(min_insert_offset, part_length + 3)
+			fragment_table.append([position + insert_position, b"<a aid=\"0000\">", skeleton_number, 0, 0, length])
+			part_length += length
+
+		position += skeleton_length + sum(fragment_lengths)
+		skeleton_number += 1
+
+	return skeleton_table, fragment_table
+
+class TestBuildParts(unittest.TestCase):
+	"""
+	buildParts() must assemble the same parts as a plain splice of every fragment into its skeleton.
+	The text has no tags in it, so that the check for fragments that split a tag never changes an insert position.
+	"""
+
+	def _check(self, min_insert_offset: int) -> None:
+		rng = random.Random(min_insert_offset)
+
+		for _ in range(500):
+			text = bytes(rng.choice(b"abcdefghij") for _ in range(rng.randint(1, 120)))
+			skeleton_table, fragment_table = _get_tables(rng, len(text), min_insert_offset)
+			expected = _splice_parts(text, skeleton_table, fragment_table)
+
+			processor = _get_processor(text, skeleton_table, fragment_table)
+			processor.buildParts(text)
+
+			self.assertEqual(processor.parts, expected, (text, skeleton_table, fragment_table))
+
+	def test_ordered_fragments(self):
+		self._check(0)
+
+	def test_fragments_before_skeleton_start(self):
+		# A corrupt fragment table can have insert positions before the start of their skeleton
+		self._check(-30)
+
+	def test_fragment_before_skeleton_start(self):
+		text = b"0123456789ABC"
+		skeleton_table = [[0, "SKEL0000000000", 1, 5, 5]]
+		fragment_table = [[3, b"<a aid=\"0000\">", 0, 0, 0, 3]]
+
+		processor = _get_processor(text, skeleton_table, fragment_table)
+		processor.buildParts(text)
+
+		# The insert position is two bytes before the skeleton, so the fragment goes two bytes before the end of the part
+		self.assertEqual(processor.parts, [b"567ABC89"])
+
+if __name__ == "__main__":
+	unittest.main()
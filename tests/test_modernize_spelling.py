@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+import importlib.machinery
+import importlib.util
+import os
+import random
+import unittest
+from unittest import mock
+import regex
+
+# modernize-spelling is a script without a .py extension, so load it by path
+_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "modernize-spelling")
+_LOADER = importlib.machinery.SourceFileLoader("modernize_spelling", _SCRIPT_PATH)
+modernize_spelling = importlib.util.module_from_spec(importlib.util.spec_from_loader("modernize_spelling", _LOADER))
+_LOADER.exec_module(modernize_spelling)
+
+sre_parse = modernize_spelling.sre_parse
+sre_constants = modernize_spelling.sre_constants
+
+_LANGUAGES = ["en-US", "en-GB"]
+_SAMPLES_PER_RULE = 20
+
+def _get_rules(language: str) -> list:
+	return modernize_spelling.ARCHAIC_SPELLINGS + modernize_spelling.ARCHAIC_SPELLINGS_BY_LANGUAGE[language]
+
+def _generate(nodes, rng: random.Random, groups: dict) -> str:
+	"""
+	Generate a string that a parsed regex may match, making a random choice at each class, repeat, and alternation.
+	Lookarounds are ignored, so the caller has to check that the result really matches.
+	"""
+
+	text = ""
+	for operation, argument in nodes:
+		if operation is sre_constants.LITERAL:
+			text += chr(argument)
+		elif operation is sre_constants.NOT_LITERAL:
+			text += rng.choice([char for char in "ax ." if ord(char) != argument])
+		elif operation is sre_constants.ANY:
+			text += "a"
+		elif operation is sre_constants.IN:
+			characters = []
+			negated = False
+			for item_operation, item_argument in argument:
+				if item_operation is sre_constants.NEGATE:
+					negated = True
+				elif item_operation is sre_constants.LITERAL:
+					characters.append(chr(item_argument))
+				elif item_operation is sre_constants.RANGE:
+					characters.append(chr(rng.randint(*item_argument)))
+				elif item_operation is sre_constants.CATEGORY:
+					characters.append({sre_constants.CATEGORY_DIGIT: "1", sre_constants.CATEGORY_SPACE: " "}.get(item_argument, "a"))
+
+			if negated:
+				characters = [char for char in "ax .," if char not in characters]
+
+			text += rng.choice(characters)
+		elif operation is sre_constants.BRANCH:
+			text += _generate(rng.choice(argument[1]), rng, groups)
+		elif operation is sre_constants.SUBPATTERN:
+			group_text = _generate(argument[-1], rng, groups)
+			groups[argument[0]] = group_text
+			text += group_text
+		elif operation in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+			minimum, maximum, subpattern = argument
+			for _ in range(rng.choice([minimum, min(minimum + 1, maximum)])):
+				text += _generate(subpattern, rng, groups)
+		elif operation is sre_constants.GROUPREF:
+			text += groups.get(argument, "")
+
+	return text
+
+def _get_samples(pattern: str) -> list:
+	"""
+	Get strings, with some surrounding text, that a rule's regex matches.
+	"""
+
+	compiled_pattern = regex.compile(pattern)
+	parsed_pattern = sre_parse.parse(pattern)
+	rng = random.Random(pattern)
+	samples = []
+
+	for _ in range(_SAMPLES_PER_RULE):
+		sample = rng.choice(["", " ", "a"]) + _generate(parsed_pattern, rng, {}) + rng.choice(["", " ", ".", "a"])
+		if compiled_pattern.search(sample):
+			samples.append(sample)
+
+	return samples
+
+def _run_every_rule(rules: list, text: str) -> str:
+	for pattern, replacement in rules:
+		text = regex.sub(pattern, replacement, text)
+
+	return text
+
+@unittest.skipIf(sre_parse is None, "Python’s internal regex parser isn’t available, so the prefilter is off")
+class TestSpellingRules(unittest.TestCase):
+	def test_every_rule_can_be_sampled(self):
+		for language in _LANGUAGES:
+			for pattern, _ in _get_rules(language):
+				with self.subTest(pattern=pattern):
+					self.assertTrue(_get_samples(pattern), "Couldn’t generate a string that the rule matches")
+
+	def test_every_rule_has_required_literals_or_runs_unconditionally(self):
+		# A rule whose literals aren't all in every one of its matches would be skipped on files it should change
+		for language in _LANGUAGES:
+			for pattern, _ in _get_rules(language):
+				literals = modernize_spelling._get_required_literals(pattern)
+				self.assertNotIn("", literals)
+
+				for sample in _get_samples(pattern):
+					with self.subTest(pattern=pattern, sample=sample):
+						match = regex.search(pattern, sample)
+						self.assertTrue(not literals or any(literal in match.group(0) for literal in literals), "Match doesn’t contain any of {}".format(literals))
+
+	def test_prefiltered_rules_match_running_every_rule(self):
+		for language in _LANGUAGES:
+			rules = _get_rules(language)
+			samples = [sample for pattern, _ in rules for sample in _get_samples(pattern)]
+
+			# Test the samples one at a time, then all together so that rules can interact
+			for text in samples + ["\n".join(samples)]:
+				with self.subTest(language=language, text=text[:100]):
+					self.assertEqual(modernize_spelling.modernize_spelling(text, language), _run_every_rule(rules, text))
+
+	def test_rules_run_without_the_prefilter(self):
+		# Without Python's internal regex parser, no rule has literals, so every rule has to run
+		for language in _LANGUAGES:
+			rules = _get_rules(language)
+			text = "\n".join(sample for pattern, _ in rules for sample in _get_samples(pattern))
+
+			with mock.patch.object(modernize_spelling, "sre_parse", None):
+				spelling_rules = modernize_spelling._SpellingRules(rules)
+
+			self.assertTrue(all(not literals for _, _, literals in spelling_rules.rules))
+			self.assertEqual(spelling_rules.apply(text), _run_every_rule(rules, text))
+
+class TestDictionary(unittest.TestCase):
+	def setUp(self):
+		self.words_file_path = os.path.join(os.path.dirname(_SCRIPT_PATH), "data", "words")
+
+	def test_words_are_sorted_lowercase_and_unique(self):
+		# DictionaryIndex binary searches data/words, so a word out of order can silently stop words around it from being found
+		with open(self.words_file_path, "rb") as file:
+			words = file.read().split(b"\n")
+
+		self.assertEqual(words[-1], b"", "data/words must end with a newline")
+		words = words[:-1]
+
+		unsorted_words = [word for previous_word, word in zip(words, words[1:]) if previous_word >= word]
+		self.assertEqual(unsorted_words, [], "Out of order or duplicated; run `LC_ALL=C sort -u data/words -o data/words`")
+
+		unnormalized_words = [word for word in words if not word or word.decode("utf-8") != word.decode("utf-8").lower().strip()]
+		self.assertEqual(unnormalized_words, [], "Blank, not lowercase, or with surrounding whitespace")
+
+	def test_every_word_is_found(self):
+		dictionary = modernize_spelling.DictionaryIndex(self.words_file_path)
+
+		with open(self.words_file_path, "r", encoding="utf-8") as file:
+			words = file.read().splitlines()
+
+		for word in words:
+			self.assertIn(word, dictionary)
+
+		self.assertNotIn("ashtrayz", dictionary)
+		self.assertNotIn("", dictionary)
+
+if __name__ == "__main__":
+	unittest.main()